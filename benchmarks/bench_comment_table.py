@@ -0,0 +1,69 @@
+"""
+Memory use and summary speed of CommentTable compared with the list of
+comment dictionaries returned by get_youtube_comments.
+
+Usage: python benchmarks/bench_comment_table.py [--count 35000] [--rounds 20]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import synthetic_comments
+from comment_table import CommentTable
+
+def traced(build):
+    """Returns what build() returns and the bytes it left allocated."""
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+def dict_summary(comments):
+    # The summary code as written before CommentTable existed
+    average = sum(c['sentiment_compound'] for c in comments) / len(comments)
+    positive = [c for c in comments if c['sentiment_compound'] >= 0.05]
+    neutral = [c for c in comments if c['sentiment_compound'] > -0.05 and c['sentiment_compound'] < 0.05]
+    negative = [c for c in comments if c['sentiment_compound'] <= -0.05]
+    return average, (len(positive), len(neutral), len(negative))
+
+def table_summary(table):
+    return table.mean_compound(), table.sentiment_counts()
+
+def best_time(function, argument, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = function(argument)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=35000, help="Number of synthetic comments")
+    parser.add_argument("--rounds", type=int, default=20, help="Timing rounds (best is reported)")
+    args = parser.parse_args()
+
+    # Both representations are built from fresh copies so neither shares strings with the other
+    comments, dict_bytes = traced(lambda: list(synthetic_comments(args.count)))
+    table, table_bytes = traced(lambda: CommentTable(synthetic_comments(args.count)))
+    table.compound # Build the arrays before timing
+
+    print(f"{args.count} comments")
+    print(f"Memory   list of dicts: {dict_bytes / 2**20:7.1f} MiB   CommentTable: {table_bytes / 2**20:7.1f} MiB   "
+          f"(x{dict_bytes / table_bytes:.1f} smaller)")
+
+    dict_result, dict_seconds = best_time(dict_summary, comments, args.rounds)
+    table_result, table_seconds = best_time(table_summary, table, args.rounds)
+    if dict_result[1] != table_result[1] or abs(dict_result[0] - table_result[0]) > 1e-9:
+        print(f"ERROR: summaries differ: {dict_result} != {table_result}")
+        sys.exit(1)
+    print(f"Summary  list of dicts: {dict_seconds * 1000:7.2f} ms    CommentTable: {table_seconds * 1000:7.2f} ms    "
+          f"(x{dict_seconds / table_seconds:.0f} faster)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+End-to-end benchmark of fetching and analyzing comments against the local fake
+YouTube API (fake_youtube_api.py): throughput, latency per API page, peak
+memory and wall/CPU time per stage at 1k, 35k and 1M comments, compared with a
+saved baseline.
+
+Every size runs in a fresh Python process, so its peak RSS is its own. The run
+fetches with get_youtube_comments (without the score cache), streams every page
+into a CSV export, the time index and the near-duplicate index as the CLI does,
+then builds a CommentTable, extracts keywords and renders the charts.
+
+Usage: python benchmarks/bench_end_to_end.py [--sizes 1000,35000,1000000] [--latency 0.02] [--error-rate 0.01]
+                                             [--output results.json] [--baseline baseline.json] [--tolerance 0.25]
+Exits with status 1 if a size regressed past the tolerance compared with the baseline.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_youtube_api import FakeYouTubeAPI, start_server
+from pipeline_profiler import PipelineProfiler, compare_reports, profile_stage
+
+VIDEO_URL = "https://www.youtube.com/watch?v=fakeVideo01"
+
+def run_one(size, report_path):
+    """Fetches and analyzes `size` comments from the server in YOUTUBE_API_ENDPOINT; writes the profile report."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+    from comment_export import open_comment_writer
+    from comment_table import CommentTable
+    from near_duplicates import NearDuplicateIndex
+    from sentiment_index import SentimentIndex
+    from youtube_analyzer import (extract_keywords, figure_to_png, get_youtube_comments, plot_keywords_bar,
+                                  plot_sentiment_pie, plot_sentiment_trend)
+    from youtube_scheduler import RequestScheduler
+
+    # Retry injected errors quickly: the fake server has no rate limit to respect
+    scheduler = RequestScheduler(rate=10000, burst=100, backoff_base=0.01, backoff_max=0.1)
+    sentiment_index = SentimentIndex()
+    duplicate_index = NearDuplicateIndex()
+    profiler = PipelineProfiler(label=f"{size} comments")
+    with tempfile.TemporaryDirectory() as directory, profiler.activate():
+        with open_comment_writer(os.path.join(directory, "comments.csv")) as writer:
+            def on_batch(batch):
+                writer.write_batch(batch)
+                sentiment_index.add(batch)
+                duplicate_index.add(batch)
+
+            comments = get_youtube_comments(VIDEO_URL, "fake-key", max_comments=size, score_cache=None,
+                                            scheduler=scheduler, on_batch=on_batch)
+        with profile_stage("table", items=len(comments)):
+            table = CommentTable(comments)
+            sentiment_counts = table.sentiment_counts()
+            table.mean_compound()
+            table.like_weighted_sentiment()
+        del comments # Leave only the table, as the CLI does
+        top_keywords = extract_keywords(table, num_keywords=10)
+        figure_to_png(plot_sentiment_pie(list(sentiment_counts)))
+        figure_to_png(plot_sentiment_trend(sentiment_index.rollup(sentiment_index.suggest_rollup())))
+        if top_keywords:
+            figure_to_png(plot_keywords_bar(top_keywords))
+        duplicate_index.stats()
+
+    report = profiler.report()
+    with open(report_path, "w", encoding="utf-8") as file:
+        json.dump(report, file)
+
+def run_size(size, args):
+    """Serves `size` comments and runs run_one() for them in a child process; returns its report."""
+    api = FakeYouTubeAPI(size, args.latency, args.jitter, args.error_rate, args.rate_limit_rate)
+    server, endpoint = start_server(api)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            report_path = os.path.join(directory, "report.json")
+            env = dict(os.environ, YOUTUBE_API_ENDPOINT=endpoint)
+            # The pipeline prints its progress; keep only failures on the console
+            child = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-one", str(size), report_path],
+                                   env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            if child.returncode != 0:
+                print(child.stdout)
+                raise RuntimeError(f"Benchmark run for {size} comments failed with status {child.returncode}")
+            with open(report_path, encoding="utf-8") as file:
+                report = json.load(file)
+    finally:
+        server.shutdown()
+        server.server_close()
+    report["server"] = {"requests": api.requests, "injected_errors": api.errors}
+    if report["comments"] != size:
+        print(f"Warning: fetched {report['comments']} of {size} comments")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,35000,1000000", help="Comma-separated comment counts")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds every fake API request takes")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Up to this many extra seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Share of requests failing with a 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Share of requests failing with a rateLimitExceeded 403")
+    parser.add_argument("--output", help="Write the reports of all sizes to this JSON file")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown (default: %(default)s)")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="Ignore stages shorter than this in the baseline (default: %(default)s)")
+    parser.add_argument("--run-one", nargs=2, metavar=("SIZE", "REPORT_PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(int(args.run_one[0]), args.run_one[1])
+        return
+
+    results = {"settings": {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate,
+                            "rate_limit_rate": args.rate_limit_rate},
+               "runs": {}}
+    print(f"{'comments':>10} {'seconds':>8} {'comments/s':>11} {'CPU s':>7} {'pages':>6} {'errors':>7} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'peak MB':>8}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        report = run_size(size, args)
+        results["runs"][str(size)] = report
+        pages = report["pages"]
+        print(f"{size:>10} {report['wall_seconds']:>8.2f} {report['comments_per_second']:>11.0f} "
+              f"{report['cpu_seconds']:>7.2f} {pages['count']:>6} {report['server']['injected_errors']:>7} "
+              f"{pages['p50_ms']:>7.1f} {pages['p95_ms']:>7.1f} {report['peak_rss_mb']:>8.1f}")
+
+    for size, report in results["runs"].items():
+        print(f"\n{PipelineProfiler().format_summary(report).replace('Pipeline Profile', f'{size} comments')}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = []
+        for size, report in results["runs"].items():
+            if size in baseline["runs"]:
+                regressions += [f"{size} comments: {regression}" for regression in
+                                compare_reports(report, baseline["runs"][size], args.tolerance, args.min_seconds)]
+            else:
+                print(f"No baseline for {size} comments")
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} compared with {args.baseline}.")
+
+if __name__ == "__main__":
+    main()
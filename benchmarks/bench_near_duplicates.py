@@ -0,0 +1,55 @@
+"""
+Scaling of the MinHash/LSH near-duplicate index (NearDuplicateIndex) from 10k
+to 1M synthetic comments with planted copy-paste campaigns, fed page by page
+as during a fetch. Time per comment should stay roughly flat as the count grows.
+
+Usage: python benchmarks/bench_near_duplicates.py [--counts 10000,100000,1000000] [--page-size 100]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import synthetic_texts_with_duplicates
+from near_duplicates import NearDuplicateIndex
+
+def campaign_quality(labels, campaigns):
+    """Planted campaigns split over more than one cluster, and clusters that mix campaigns or ordinary comments."""
+    clusters_per_campaign = defaultdict(set)
+    campaigns_per_cluster = defaultdict(set)
+    for label, campaign in zip(labels.tolist(), campaigns):
+        if campaign >= 0:
+            clusters_per_campaign[campaign].add(label)
+        campaigns_per_cluster[label].add(campaign)
+    split = sum(1 for clusters in clusters_per_campaign.values() if len(clusters) > 1)
+    mixed = sum(1 for members in campaigns_per_cluster.values() if len(members) > 1)
+    return len(clusters_per_campaign), split, mixed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--counts", default="10000,100000,1000000", help="Comma-separated comment counts")
+    parser.add_argument("--page-size", type=int, default=100, help="Comments added per call, like one API page")
+    args = parser.parse_args()
+
+    print(f"{'comments':>10} {'seconds':>8} {'us/comment':>11} {'clusters':>9} {'campaigns':>10} {'split':>6} {'mixed':>6}"
+          f" {'pairs a pairwise scan compares':>31}")
+    for count in (int(value) for value in args.counts.split(",")):
+        texts, campaigns = synthetic_texts_with_duplicates(count)
+        pages = [[{"text": text} for text in texts[i:i + args.page_size]] for i in range(0, count, args.page_size)]
+
+        index = NearDuplicateIndex()
+        start = time.perf_counter()
+        for page in pages:
+            index.add(page)
+        seconds = time.perf_counter() - start
+
+        stats = index.stats()
+        planted, split, mixed = campaign_quality(index.cluster_labels(), campaigns)
+        print(f"{count:>10} {seconds:>8.2f} {seconds / count * 1e6:>11.1f} {stats['duplicate_clusters']:>9} "
+              f"{planted:>10} {split:>6} {mixed:>6} {count * (count - 1) // 2:>31,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Throughput and peak memory of the offline re-analysis (reanalyze_comment_files)
+over a saved comment file, with one worker and with several.
+
+Usage: python benchmarks/bench_reanalyze.py [--count 200000] [--workers 4] [--format csv]
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import synthetic_comments
+from comment_export import EXPORT_FORMATS, write_comments
+from youtube_analyzer import reanalyze_comment_files
+
+def peak_rss_mib():
+    # ru_maxrss is in KiB on Linux; the pool workers are counted through RUSAGE_CHILDREN
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / 1024, children / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=200000, help="Number of synthetic comments in the file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes of the parallel run")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv", help="Saved file format")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"comments.{args.format}")
+        write_comments(synthetic_comments(args.count), path)
+        print(f"{args.count} comments, {os.path.getsize(path) / 2**20:.1f} MiB {args.format} file")
+
+        results = []
+        for workers in dict.fromkeys([1, args.workers]):
+            start = time.perf_counter()
+            report = reanalyze_comment_files([path], workers=workers)
+            seconds = time.perf_counter() - start
+            results.append(report["total"])
+            print(f"workers={workers:<3} {seconds:7.2f} s   {args.count / seconds:9.0f} comments/s")
+
+        if any(total != results[0] for total in results[1:]):
+            print("ERROR: reports differ between worker counts")
+            sys.exit(1)
+        own, children = peak_rss_mib()
+        print(f"Peak RSS  main process: {own:.0f} MiB   largest worker: {children:.0f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+How much scoring work the ScoreCache saves on a saved comment file (by
+default the bundled youtube_comments_with_sentiment.csv): one pass as during
+a first analysis, then a second pass as during a re-analysis.
+
+Usage: python benchmarks/bench_score_cache.py [CSV_PATH] [--repeat N]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from comment_cache import ScoreCache
+from youtube_analyzer import score_comments
+
+def timed_pass(texts, cache):
+    start = time.perf_counter()
+    scores = score_comments(texts, cache=cache)
+    return scores, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("csv_path", nargs="?", default=os.path.join(ROOT, "youtube_comments_with_sentiment.csv"))
+    parser.add_argument("--repeat", type=int, default=1, help="Concatenate the file N times to make it larger")
+    args = parser.parse_args()
+
+    with open(args.csv_path, newline="", encoding="utf-8") as file:
+        texts = [row["text"] for row in csv.DictReader(file)] * args.repeat
+    print(f"{len(texts)} comments, {len(set(texts))} distinct texts")
+
+    score_comments(["warm up"]) # Load the VADER lexicon outside of the timed passes
+    uncached_scores, uncached_seconds = timed_pass(texts, None)
+    print(f"No cache:        {uncached_seconds * 1000:8.1f} ms")
+
+    cache = ScoreCache()
+    for label in ("First analysis:", "Re-analysis:"):
+        scores, seconds = timed_pass(texts, cache)
+        if scores != uncached_scores:
+            print("ERROR: cached scores differ from uncached scores")
+            sys.exit(1)
+        stats = cache.stats()
+        print(f"{label:<16} {seconds * 1000:8.1f} ms  hits={stats['hits']} misses={stats['misses']} "
+              f"hit rate={stats['hit_rate']:.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Throughput of youtube_analyzer.score_comments at 1, 2, 4 and 8 worker
+processes on a synthetic corpus, checking that every parallel run returns
+exactly the serial scores.
+
+Usage: python benchmarks/bench_score_comments.py [--count 100000] [--chunk-size 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import synthetic_texts
+from youtube_analyzer import score_comments
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000, help="Number of synthetic comments")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Texts per worker task")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.count)
+    print(f"Scoring {len(texts)} synthetic comments (chunk size {args.chunk_size}, {os.cpu_count()} CPUs)")
+
+    serial_scores = None
+    serial_seconds = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        scores = score_comments(texts, workers=workers, chunk_size=args.chunk_size)
+        seconds = time.perf_counter() - start
+
+        if serial_scores is None:
+            serial_scores, serial_seconds = scores, seconds
+        elif scores != serial_scores:
+            print(f"ERROR: scores with {workers} workers differ from the first run")
+            sys.exit(1)
+
+        print(f"workers={workers:<2} {seconds:7.2f}s  {len(texts) / seconds:9.0f} comments/s  "
+              f"speedup x{serial_seconds / seconds:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Startup cost of the analyzer modules, measured with `python -X importtime`
+in a fresh interpreter. Fails (exit code 1) if importing them takes longer
+than --max-ms, or if a heavy module that should be imported lazily
+(NLTK, matplotlib, googleapiclient.discovery, and numpy outside the modules
+built on it) is imported at startup.
+
+Usage: python benchmarks/bench_startup.py [--module youtube_analyzer] [--max-ms 400] [--runs 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported when first used
+LAZY_MODULES = ["nltk", "matplotlib", "googleapiclient.discovery"]
+# Modules whose classes are numpy arrays; every other module must import numpy lazily too
+NUMPY_MODULES = {"comment_table", "sentiment_index", "near_duplicates"}
+
+def import_times(module):
+    """
+    Imports `module` in a fresh interpreter and returns {imported module: cumulative
+    microseconds} for the module and everything its import pulled in (the modules
+    the interpreter loads at startup are left out).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:      1234 |      56789 |   package.module"; children come
+        # before their parent and are indented, so a top-level line closes the subtree above it.
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+        if not name[1:].startswith(" "): # Top level
+            if name.strip() == module:
+                return times
+            times = {}
+    raise RuntimeError(f"No import time reported for {module}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", action="append", help="Module to import (repeatable, default: the analyzer modules)")
+    parser.add_argument("--max-ms", type=float, default=400.0, help="Fail if an import takes longer than this")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module (the fastest run counts)")
+    args = parser.parse_args()
+    modules = args.module or ["youtube_analyzer", "comment_cache", "comment_table", "youtube_scheduler"]
+
+    failed = False
+    for module in modules:
+        runs = [import_times(module) for _ in range(args.runs)]
+        times = min(runs, key=lambda t: t[module])
+        total_ms = times[module] / 1000
+        print(f"{module}: {total_ms:.1f} ms (best of {args.runs})")
+        heaviest = sorted(((us, name) for name, us in times.items() if name != module), reverse=True)[:5]
+        for us, name in heaviest:
+            print(f"    {us / 1000:8.1f} ms  {name}")
+
+        if total_ms > args.max_ms:
+            print(f"  FAIL: import takes longer than {args.max_ms:.0f} ms")
+            failed = True
+        lazy = LAZY_MODULES if module in NUMPY_MODULES else LAZY_MODULES + ["numpy"]
+        eager = [name for name in lazy if name in times]
+        if eager:
+            print(f"  FAIL: imported at startup but should be lazy: {', '.join(eager)}")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
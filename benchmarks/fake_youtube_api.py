@@ -0,0 +1,235 @@
+"""
+Local stand-in for the YouTube Data API commentThreads and comments (replies)
+endpoints, serving paginated synthetic comments, for benchmarks that need no
+API key or quota. Supports configurable comment and reply counts, per-request
+latency and error injection (5xx errors, rate-limit and quota-exceeded 403s).
+
+Point the analyzer at it with the YOUTUBE_API_ENDPOINT environment variable:
+
+    python benchmarks/fake_youtube_api.py --comments 35000 --latency 0.05 --port 8765
+    YOUTUBE_API_ENDPOINT=http://127.0.0.1:8765/ YOUTUBE_API_KEY=fake python youtube_analyzer.py --url https://youtu.be/dQw4w9WgXcQ
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from synthetic import synthetic_text
+
+# The real API returns at most 100 comment threads per page
+MAX_RESULTS = 100
+
+class FakeYouTubeAPI:
+    """
+    The data and failure behaviour of the fake API. Every video has `comments`
+    top-level comments (newest first, like order=time); a page is generated
+    from a seed derived from the video and offset, so the same request always
+    returns the same comments without keeping them in memory.
+    A reply_share of the threads have `replies` replies each, served by
+    comments.list with parentId set to the thread's id.
+    Each request sleeps latency (+ up to `jitter`) seconds, then fails with a
+    503 with probability error_rate, with a rateLimitExceeded 403 with
+    probability rate_limit_rate, and with quotaExceeded once quota_after
+    requests have been served.
+    """
+
+    def __init__(self, comments=35000, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 quota_after=None, seed=0, replies=0, reply_share=0.1):
+        self.comments = comments
+        self.replies = replies
+        self.reply_share = reply_share
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.quota_after = quota_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def reply_count(self, video_id, index):
+        """Number of replies of thread `index` of a video (the same on every request)."""
+        if not self.replies:
+            return 0
+        roll = zlib.crc32(f"{video_id}:{index}:replies".encode("utf-8")) / 2**32
+        return self.replies if roll < self.reply_share else 0
+
+    def page(self, video_id, page_token, max_results):
+        """The JSON body of a commentThreads.list response."""
+        start = int(page_token or 0)
+        size = max(0, min(MAX_RESULTS, max_results, self.comments - start))
+        rng = random.Random(zlib.crc32(f"{video_id}:{start}".encode("utf-8")))
+        items = []
+        for index in range(start, start + size):
+            # Newest first: comment 0 is the most recent, one minute apart
+            published = time.gmtime(1750000000 - index * 60)
+            snippet = {
+                "authorDisplayName": f"@user{rng.randrange(max(1, self.comments // 3))}",
+                "textDisplay": synthetic_text(rng),
+                "publishedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", published),
+                "likeCount": int(rng.paretovariate(1.5)) - 1,
+            }
+            snippet["textOriginal"] = snippet["textDisplay"]
+            comment_id = f"{video_id}.{index}"
+            items.append({
+                "kind": "youtube#commentThread",
+                "id": comment_id,
+                "snippet": {
+                    "videoId": video_id,
+                    "totalReplyCount": self.reply_count(video_id, index),
+                    "topLevelComment": {"kind": "youtube#comment", "id": comment_id, "snippet": snippet},
+                },
+            })
+        body = {"kind": "youtube#commentThreadListResponse",
+                "pageInfo": {"totalResults": len(items), "resultsPerPage": MAX_RESULTS}, "items": items}
+        if start + size < self.comments:
+            body["nextPageToken"] = str(start + size)
+        return body
+
+    def reply_page(self, parent_id, page_token, max_results):
+        """The JSON body of a comments.list response for the replies of thread `parent_id`."""
+        video_id, _, index = parent_id.rpartition(".")
+        if not video_id or not index.isdigit() or int(index) >= self.comments:
+            return None
+        index = int(index)
+        total = self.reply_count(video_id, index)
+        start = int(page_token or 0)
+        size = max(0, min(MAX_RESULTS, max_results, total - start))
+        rng = random.Random(zlib.crc32(f"{parent_id}:{start}".encode("utf-8")))
+        items = []
+        for reply in range(start, start + size):
+            # Replies follow their thread, one second apart
+            published = time.gmtime(1750000000 - index * 60 + reply + 1)
+            text = synthetic_text(rng)
+            items.append({
+                "kind": "youtube#comment",
+                "id": f"{parent_id}.{reply}",
+                "snippet": {
+                    "videoId": video_id,
+                    "parentId": parent_id,
+                    "authorDisplayName": f"@user{rng.randrange(max(1, self.comments // 3))}",
+                    "textDisplay": text,
+                    "textOriginal": text,
+                    "publishedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", published),
+                    "likeCount": int(rng.paretovariate(1.5)) - 1,
+                },
+            })
+        body = {"kind": "youtube#commentListResponse", "items": items}
+        if start + size < total:
+            body["nextPageToken"] = str(start + size)
+        return body
+
+    def failure(self, params=None):
+        """
+        Returns (status, reason) of an injected error for the next request, or None.
+        `params` are the request's query parameters (for subclasses that fail specific requests).
+        """
+        with self._lock:
+            self.requests += 1
+            roll = self._rng.random()
+            if self.quota_after is not None and self.requests > self.quota_after:
+                failure = (403, "quotaExceeded")
+            elif roll < self.error_rate:
+                failure = (503, "backendError")
+            elif roll < self.error_rate + self.rate_limit_rate:
+                failure = (403, "rateLimitExceeded")
+            else:
+                return None
+            self.errors += 1
+            return failure
+
+    def delay(self):
+        with self._lock:
+            extra = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+def _error_body(status, reason):
+    return {"error": {"code": status, "message": f"Injected error: {reason}",
+                      "errors": [{"domain": "youtube.fake", "reason": reason, "message": reason}]}}
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # Keep-alive, like the real API
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {name: values[0] for name, values in parse_qs(url.query).items()}
+            if url.path.endswith("/commentThreads"):
+                required = "videoId"
+            elif url.path.endswith("/comments"):
+                required = "parentId"
+            else:
+                self._send(404, _error_body(404, "notFound"))
+                return
+            if required not in params:
+                self._send(400, _error_body(400, "missingRequiredParameter"))
+                return
+            api.delay()
+            failure = api.failure(params)
+            if failure is not None:
+                self._send(failure[0], _error_body(*failure))
+                return
+            max_results = int(params.get("maxResults", 20))
+            if required == "videoId":
+                self._send(200, api.page(params["videoId"], params.get("pageToken"), max_results))
+                return
+            body = api.reply_page(params["parentId"], params.get("pageToken"), max_results)
+            if body is None:
+                self._send(404, _error_body(404, "commentNotFound"))
+            else:
+                self._send(200, body)
+
+        def log_message(self, format, *args):
+            pass # One line per request would swamp the benchmark output
+
+    return Handler
+
+def start_server(api, host="127.0.0.1", port=0):
+    """Serves `api` on a background thread; returns the server and its endpoint URL (for YOUTUBE_API_ENDPOINT)."""
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-youtube-api", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--comments", type=int, default=35000, help="Top-level comments per video")
+    parser.add_argument("--replies", type=int, default=0, help="Replies of each thread that has replies")
+    parser.add_argument("--reply-share", type=float, default=0.1, help="Share of threads that have replies")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds every request takes")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with a 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Share of requests failing with a rateLimitExceeded 403")
+    parser.add_argument("--quota-after", type=int, help="Fail with quotaExceeded after this many requests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    args = parser.parse_args()
+
+    api = FakeYouTubeAPI(args.comments, args.latency, args.jitter, args.error_rate, args.rate_limit_rate,
+                         args.quota_after, replies=args.replies, reply_share=args.reply_share)
+    server, endpoint = start_server(api, args.host, args.port)
+    print(f"Serving fake YouTube API at {endpoint}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Synthetic YouTube-like comments for the benchmark scripts, so they can run
+without an API key or quota. Generation is seeded and therefore reproducible.
+"""
+import random
+
+# A mix of VADER lexicon words, neutral filler and typical comment noise
+_POSITIVE = ["love", "great", "amazing", "best", "awesome", "good", "nice", "thanks", "beautiful", "funny"]
+_NEGATIVE = ["hate", "terrible", "worst", "bad", "boring", "awful", "sad", "wrong", "stupid", "annoying"]
+_NEUTRAL = ["video", "this", "the", "channel", "watch", "part", "people", "time", "really", "just",
+            "music", "song", "world", "first", "year", "history", "map", "country", "war", "explain"]
+_NOISE = ["!!", "?", "lol", "😂", "❤️", "...", "2025", "#1", "w", "fr"]
+_SPAM = ["first", "Who's watching in 2025?", "Check out my channel!!", "❤️❤️❤️", "W video"]
+
+def synthetic_text(rng):
+    """Returns one random comment text."""
+    if rng.random() < 0.05:
+        return rng.choice(_SPAM) # Short duplicate-style comments are common on large videos
+    words = []
+    for _ in range(rng.randint(3, 30)):
+        roll = rng.random()
+        if roll < 0.12:
+            words.append(rng.choice(_POSITIVE))
+        elif roll < 0.2:
+            words.append(rng.choice(_NEGATIVE))
+        elif roll < 0.9:
+            words.append(rng.choice(_NEUTRAL))
+        else:
+            words.append(rng.choice(_NOISE))
+    text = " ".join(words)
+    return text[0].upper() + text[1:]
+
+def synthetic_texts(count, seed=0):
+    """Returns a list of `count` random comment texts."""
+    rng = random.Random(seed)
+    return [synthetic_text(rng) for _ in range(count)]
+
+def synthetic_comments(count, seed=0):
+    """Yields `count` comment dictionaries shaped like get_youtube_comments results."""
+    rng = random.Random(seed)
+    for i in range(count):
+        compound = round(rng.uniform(-1, 1), 4) if rng.random() < 0.7 else 0.0
+        pos = round(max(compound, 0) * rng.uniform(0.3, 0.9), 3)
+        neg = round(max(-compound, 0) * rng.uniform(0.3, 0.9), 3)
+        yield {
+            "author": f"@user{rng.randint(0, count // 3 + 1)}",
+            "text": synthetic_text(rng),
+            "published_at": f"2025-06-{1 + i * 28 // max(count, 1):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00Z",
+            "like_count": int(rng.paretovariate(1.5)) - 1,
+            "sentiment_compound": compound,
+            "sentiment_pos": pos,
+            "sentiment_neu": round(1 - pos - neg, 3),
+            "sentiment_neg": neg,
+        }
+
+def _mutated(words, rng):
+    """A copy-paste variant of a comment: one word swapped, dropped or added, plus noise."""
+    words = list(words)
+    edit = rng.randrange(3)
+    position = rng.randrange(len(words))
+    if edit == 0:
+        words[position] = rng.choice(_NEUTRAL)
+    elif edit == 1 and len(words) > 1:
+        del words[position]
+    else:
+        words.insert(position, rng.choice(_NOISE))
+    text = " ".join(words)
+    return text.upper() if rng.random() < 0.1 else text
+
+def synthetic_texts_with_duplicates(count, seed=0, duplicate_share=0.2, campaign_size=200):
+    """
+    Returns `count` comment texts where about duplicate_share of them are
+    slightly edited copies of a few long "campaign" comments (bot / copy-paste
+    spam), and the campaign number of every text (-1 for ordinary comments).
+    """
+    rng = random.Random(seed)
+    campaigns = [synthetic_text(rng).split() + [f"promo{number}"] + synthetic_text(rng).split()
+                 for number in range(max(1, int(count * duplicate_share) // campaign_size))]
+    texts, labels = [], []
+    for _ in range(count):
+        if rng.random() < duplicate_share:
+            campaign = rng.randrange(len(campaigns))
+            texts.append(_mutated(campaigns[campaign], rng))
+            labels.append(campaign)
+        else:
+            texts.append(synthetic_text(rng))
+            labels.append(-1)
+    return texts, labels
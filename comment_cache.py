@@ -0,0 +1,402 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from pipeline_profiler import profiled
+
+# Default location of the on-disk comment cache (can be overridden with an environment variable)
+DEFAULT_CACHE_PATH = os.getenv("YOUTUBE_COMMENT_CACHE", "youtube_comments_cache.sqlite3")
+# Default size limit of the cache file before least recently used videos are evicted
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+COMMENT_FIELDS = [
+    "author", "text", "published_at", "like_count",
+    "sentiment_compound", "sentiment_pos", "sentiment_neu", "sentiment_neg"
+]
+
+def comment_key(comment):
+    """Returns a stable identifier for a comment dictionary (the API comment ID is not kept in the rows)."""
+    raw = "\0".join((comment["author"], comment["published_at"], comment["text"]))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+class CommentCache:
+    """
+    SQLite-backed store of fetched comments and their sentiment scores, keyed by
+    video ID (as returned by get_video_id).
+    Comments are deduplicated per video, videos are evicted least recently used
+    first once the database grows past max_bytes, and invalidate() drops a video
+    (or everything) explicitly.
+    Each video also records its fetch depth: how many of its newest comments
+    the cache holds without gaps, or that it holds all of them. covers() tells
+    whether that is enough for a request of max_comments comments.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                last_access REAL NOT NULL,
+                fetch_depth INTEGER NOT NULL DEFAULT 0,
+                fetched_all INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS comments (
+                video_id TEXT NOT NULL,
+                comment_key TEXT NOT NULL,
+                author TEXT,
+                text TEXT,
+                published_at TEXT,
+                like_count INTEGER,
+                sentiment_compound REAL,
+                sentiment_pos REAL,
+                sentiment_neu REAL,
+                sentiment_neg REAL,
+                UNIQUE (video_id, comment_key)
+            );
+            CREATE INDEX IF NOT EXISTS comments_by_time ON comments (video_id, published_at);
+        """)
+        # Caches written before fetch depths were recorded get depth 0, so their videos are fetched again once
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(videos)")}
+        with self._conn:
+            for column in ("fetch_depth", "fetched_all"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE videos ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _touch(self, video_id):
+        self._conn.execute(
+            "INSERT INTO videos (video_id, last_access) VALUES (?, ?) "
+            "ON CONFLICT (video_id) DO UPDATE SET last_access = excluded.last_access",
+            (video_id, time.time())
+        )
+
+    def has_video(self, video_id):
+        """True if comments for the video have been stored before."""
+        row = self._conn.execute("SELECT 1 FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return row is not None
+
+    @profiled("comment_cache")
+    def get(self, video_id, limit=None):
+        """Returns the cached comments of a video as comment dictionaries, newest first."""
+        query = f"SELECT {', '.join(COMMENT_FIELDS)} FROM comments WHERE video_id = ? ORDER BY published_at DESC, rowid"
+        params = [video_id]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._conn:
+            rows = self._conn.execute(query, params).fetchall()
+            if self.has_video(video_id):
+                self._touch(video_id)
+        return [dict(zip(COMMENT_FIELDS, row)) for row in rows]
+
+    def newest_published_at(self, video_id):
+        """Returns the publishedAt timestamp of the newest cached comment of a video, or None."""
+        row = self._conn.execute(
+            "SELECT MAX(published_at) FROM comments WHERE video_id = ?", (video_id,)
+        ).fetchone()
+        return row[0]
+
+    def fetch_depth(self, video_id):
+        """Returns (depth, fetched_all) of a cached video, or None if it is not cached."""
+        row = self._conn.execute(
+            "SELECT fetch_depth, fetched_all FROM videos WHERE video_id = ?", (video_id,)
+        ).fetchone()
+        return None if row is None else (row[0], bool(row[1]))
+
+    def set_fetch_depth(self, video_id, depth, fetched_all=False):
+        """
+        Records that the cache holds the newest `depth` comments of a video without
+        gaps (or all of its comments if fetched_all). Call it after add().
+        """
+        with self._conn:
+            self._conn.execute("UPDATE videos SET fetch_depth = ?, fetched_all = ? WHERE video_id = ?",
+                               (depth, int(fetched_all), video_id))
+
+    def covers(self, video_id, max_comments):
+        """True if the cached comments of a video are enough to answer a fetch of max_comments comments."""
+        depth = self.fetch_depth(video_id)
+        return depth is not None and (depth[1] or depth[0] >= max_comments)
+
+    @profiled("comment_cache")
+    def add(self, video_id, comments):
+        """
+        Stores comment dictionaries for a video, skipping ones that are already cached,
+        and returns how many were new. Evicts other videos if the cache grew too large.
+        """
+        rows = [
+            (video_id, comment_key(c)) + tuple(c[field] for field in COMMENT_FIELDS)
+            for c in comments
+        ]
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO comments (video_id, comment_key, {', '.join(COMMENT_FIELDS)}) "
+                f"VALUES ({', '.join('?' * (len(COMMENT_FIELDS) + 2))})",
+                rows
+            )
+            added = self._conn.total_changes - before
+            self._touch(video_id)
+        self.evict(keep=video_id)
+        return added
+
+    def invalidate(self, video_id=None):
+        """Removes one video from the cache, or every video if no ID is given."""
+        with self._conn:
+            if video_id is None:
+                self._conn.execute("DELETE FROM comments")
+                self._conn.execute("DELETE FROM videos")
+            else:
+                self._conn.execute("DELETE FROM comments WHERE video_id = ?", (video_id,))
+                self._conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+
+    def size_bytes(self):
+        """Returns the space used by cached data (freed pages are not counted)."""
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def evict(self, max_bytes=None, keep=None):
+        """
+        Drops least recently used videos until the cache is below max_bytes
+        (defaults to the limit given at construction). The `keep` video is never evicted.
+        Returns the IDs of the evicted videos.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        evicted = []
+        if max_bytes is None:
+            return evicted
+        while self.size_bytes() > max_bytes:
+            row = self._conn.execute(
+                "SELECT video_id FROM videos WHERE video_id IS NOT ? ORDER BY last_access LIMIT 1", (keep,)
+            ).fetchone()
+            if row is None:
+                break
+            self.invalidate(row[0])
+            evicted.append(row[0])
+        return evicted
+
+
+SCORE_FIELDS = ["compound", "pos", "neu", "neg"]
+
+class ScoreCache:
+    """
+    Content-addressed cache of VADER polarity scores, keyed by a hash of the
+    comment text, so duplicate comments ("first", emoji-only replies, spam,
+    copy-pasted lines) are scored only once.
+    Keeps up to `maxsize` scores in an in-memory LRU; if `path` is given, scores
+    are also persisted to (and read back from) a SQLite file.
+    Hit and miss counters are available through stats().
+    """
+
+    def __init__(self, maxsize=100000, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._scores = OrderedDict()
+        self._lock = threading.Lock() # Streamlit sessions may share one cache across threads
+        self._conn = None
+        if path is not None:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores (text_hash BLOB PRIMARY KEY, "
+                "compound REAL, pos REAL, neu REAL, neg REAL) WITHOUT ROWID"
+            )
+
+    @staticmethod
+    def text_key(text):
+        """Returns the cache key of a comment text."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _remember(self, key, scores):
+        self._scores[key] = scores
+        self._scores.move_to_end(key)
+        if len(self._scores) > self.maxsize:
+            self._scores.popitem(last=False)
+
+    def _lookup(self, key):
+        scores = self._scores.get(key)
+        if scores is not None:
+            self._scores.move_to_end(key)
+            return scores
+        if self._conn is not None:
+            row = self._conn.execute(
+                "SELECT compound, pos, neu, neg FROM scores WHERE text_hash = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                scores = dict(zip(SCORE_FIELDS, row))
+                self._remember(key, scores)
+        return scores
+
+    def get(self, text):
+        """Returns the cached scores of a text, or None."""
+        with self._lock:
+            scores = self._lookup(self.text_key(text))
+            if scores is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return scores
+
+    def get_many(self, texts):
+        """
+        Looks up many texts at once. Returns the list of cached scores (None where
+        missing) and the distinct texts that still need scoring. Repeats of a missing
+        text within `texts` count as hits, since they will not be scored again.
+        """
+        results = []
+        missing = {}
+        with self._lock:
+            for text in texts:
+                key = self.text_key(text)
+                scores = self._lookup(key)
+                if scores is None and key not in missing:
+                    missing[key] = text
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                results.append(scores)
+        return results, list(missing.values())
+
+    def put_many(self, texts, scores_list):
+        """Stores the scores of many texts."""
+        entries = [(self.text_key(text), scores) for text, scores in zip(texts, scores_list)]
+        with self._lock:
+            for key, scores in entries:
+                self._remember(key, scores)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                        [(key,) + tuple(scores[field] for field in SCORE_FIELDS) for key, scores in entries]
+                    )
+
+    def put(self, text, scores):
+        self.put_many([text], [scores])
+
+    def stats(self):
+        """Returns hit/miss counters and the current in-memory size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._scores),
+        }
+
+    def clear(self):
+        """Forgets every cached score (including the persistent ones) and resets the counters."""
+        with self._lock:
+            self._scores.clear()
+            self.hits = self.misses = 0
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM scores")
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+class ResultCache:
+    """
+    In-memory cache for finished analyses (e.g. in a Streamlit session), with a
+    time-to-live per entry and a cap on the total size of the cached values.
+    The caller passes each value's size in bytes; least recently used entries
+    are dropped once the cap is exceeded. Hit/miss counters are in stats().
+    on_evict(key, value), if given, is called for every value that leaves the
+    cache (expired, evicted, replaced or cleared), e.g. to delete its files.
+    """
+
+    def __init__(self, ttl=1800, max_bytes=256 * 1024 * 1024, clock=time.monotonic, on_evict=None):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._clock = clock
+        self._entries = OrderedDict() # key -> (expiry time, size, value)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key):
+        _, size, value = self._entries.pop(key)
+        self.total_bytes -= size
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def get(self, key):
+        """Returns the cached value for key, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= self._clock():
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def put(self, key, value, size):
+        """Caches a value of `size` bytes. Values larger than the whole cap are not cached."""
+        if key in self._entries:
+            self._drop(key)
+        if size > self.max_bytes:
+            if self.on_evict is not None:
+                self.on_evict(key, value)
+            return
+        self._entries[key] = (self._clock() + self.ttl, size, value)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def resize(self, key, size):
+        """
+        Updates the size of a cached value that has grown or shrunk (e.g. parts
+        computed after put), evicting least recently used entries if the cap is
+        now exceeded. Does nothing if the key is not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        self._entries[key] = (entry[0], size, entry[2])
+        self._entries.move_to_end(key)
+        self.total_bytes += size - entry[1]
+        if size > self.max_bytes:
+            self._drop(key)
+            return
+        while self.total_bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self):
+        for key in list(self._entries):
+            self._drop(key)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,215 @@
+import csv
+import json
+import mmap
+import os
+
+from comment_cache import COMMENT_FIELDS
+from pipeline_profiler import profile_stage
+
+# Supported export formats and the file extensions they are recognized by
+EXPORT_FORMATS = {
+    "csv": (".csv",),
+    "jsonl": (".jsonl", ".ndjson"),
+    "parquet": (".parquet",),
+}
+
+# Column types, used to restore numbers when reading text formats back
+_FIELD_TYPES = {
+    "like_count": int,
+    "sentiment_compound": float,
+    "sentiment_pos": float,
+    "sentiment_neu": float,
+    "sentiment_neg": float,
+}
+
+def format_for_path(path):
+    """Guesses the export format from a file name ("csv", "jsonl" or "parquet")."""
+    extension = os.path.splitext(path)[1].lower()
+    for fmt, extensions in EXPORT_FORMATS.items():
+        if extension in extensions:
+            return fmt
+    raise ValueError(f"Unknown comment file type for {path!r}; expected one of: {', '.join(EXPORT_FORMATS)}")
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The parquet format needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+class CommentWriter:
+    """
+    Base class of the streaming comment writers: rows are written batch by batch
+    (e.g. from the on_batch callback of a fetch), so memory use does not grow
+    with the number of comments. The file is only created once the first batch
+    arrives, so an empty fetch leaves no empty file behind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows_written = 0
+        self._file = None
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write(self, comments):
+        raise NotImplementedError
+
+    def write_batch(self, comments):
+        """Writes a batch of comment dictionaries."""
+        comments = list(comments)
+        if not comments:
+            return
+        with profile_stage("export", items=len(comments)):
+            if self._file is None:
+                self._open()
+            self._write(comments)
+        self.rows_written += len(comments)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class CSVCommentWriter(CommentWriter):
+    """Writes comments as CSV with the same columns as the analyzer's CSV export."""
+
+    def _open(self):
+        # newline='' avoids extra blank rows, UTF-8 keeps emoji and non-English comments intact
+        self._file = open(self.path, mode='w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=COMMENT_FIELDS)
+        self._writer.writeheader()
+
+    def _write(self, comments):
+        self._writer.writerows(comments)
+
+class JSONLinesCommentWriter(CommentWriter):
+    """Writes one JSON object per comment per line."""
+
+    def _open(self):
+        self._file = open(self.path, mode='w', encoding='utf-8')
+
+    def _write(self, comments):
+        self._file.writelines(json.dumps(comment, ensure_ascii=False) + "\n" for comment in comments)
+
+class ParquetCommentWriter(CommentWriter):
+    """
+    Writes comments to a compressed Parquet file (requires pyarrow). Rows are
+    buffered up to row_group_size and then flushed as one row group, so memory
+    stays bounded by the row group size.
+    """
+
+    def __init__(self, path, row_group_size=10000, compression="zstd"):
+        super().__init__(path)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._pending = []
+
+    def _schema(self):
+        pa = _import_pyarrow()
+        return pa.schema([
+            ("author", pa.string()), ("text", pa.string()), ("published_at", pa.string()),
+            ("like_count", pa.int64()),
+            ("sentiment_compound", pa.float64()), ("sentiment_pos", pa.float64()),
+            ("sentiment_neu", pa.float64()), ("sentiment_neg", pa.float64()),
+        ])
+
+    def _open(self):
+        pa = _import_pyarrow()
+        self._file = pa.parquet.ParquetWriter(self.path, self._schema(), compression=self.compression)
+
+    def _flush(self):
+        if self._pending:
+            pa = _import_pyarrow()
+            self._file.write_table(pa.Table.from_pylist(self._pending, schema=self._schema()))
+            self._pending = []
+
+    def _write(self, comments):
+        self._pending.extend({field: comment[field] for field in COMMENT_FIELDS} for comment in comments)
+        if len(self._pending) >= self.row_group_size:
+            self._flush()
+
+    def close(self):
+        if self._file is not None:
+            self._flush()
+        super().close()
+
+_WRITERS = {"csv": CSVCommentWriter, "jsonl": JSONLinesCommentWriter, "parquet": ParquetCommentWriter}
+
+def open_comment_writer(path, fmt=None, **options):
+    """Returns a streaming writer for `path` in the given format (guessed from the extension by default)."""
+    return _WRITERS[fmt or format_for_path(path)](path, **options)
+
+def write_comments(comments, path, fmt=None, batch_size=10000):
+    """Writes any iterable of comment dictionaries (e.g. a CommentTable) in batches; returns the row count."""
+    with open_comment_writer(path, fmt) as writer:
+        batch = []
+        for comment in comments:
+            batch.append(comment)
+            if len(batch) >= batch_size:
+                writer.write_batch(batch)
+                batch = []
+        writer.write_batch(batch)
+    return writer.rows_written
+
+# --- Reading saved files back ---
+
+def _mapped_lines(path):
+    """Yields the decoded lines of a text file through a read-only memory map."""
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            first = True
+            for line in iter(mapped.readline, b""):
+                text = line.decode("utf-8")
+                if first:
+                    text = text.lstrip("\ufeff") # Files saved by Excel start with a byte order mark
+                    first = False
+                yield text
+
+def _typed(row):
+    for field, convert in _FIELD_TYPES.items():
+        value = row.get(field)
+        if isinstance(value, str):
+            row[field] = convert(value) if value != "" else convert()
+    return row
+
+def _batched(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def read_comment_batches(path, batch_size=10000, fmt=None):
+    """
+    Streams a saved comment file (CSV, JSON Lines or Parquet) back as batches of
+    comment dictionaries, memory-mapping the file instead of reading it whole,
+    so files of any size can be re-analyzed with bounded memory.
+    """
+    fmt = fmt or format_for_path(path)
+    if fmt == "parquet":
+        pa = _import_pyarrow()
+        parquet_file = pa.parquet.ParquetFile(path, memory_map=True)
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield record_batch.to_pylist()
+    elif fmt == "jsonl":
+        yield from _batched((_typed(json.loads(line)) for line in _mapped_lines(path) if line.strip()), batch_size)
+    else:
+        yield from _batched((_typed(row) for row in csv.DictReader(_mapped_lines(path))), batch_size)
+
+def read_comments(path, fmt=None):
+    """Streams the comment dictionaries of a saved comment file one by one."""
+    for batch in read_comment_batches(path, fmt=fmt):
+        yield from batch
@@ -0,0 +1,196 @@
+import sys
+
+import numpy as np
+
+from comment_cache import COMMENT_FIELDS
+
+# VADER's usual compound score thresholds for positive and negative comments
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+_SCORE_FIELDS = ["sentiment_compound", "sentiment_pos", "sentiment_neu", "sentiment_neg"]
+
+class CommentTable:
+    """
+    Compact column-oriented store of analyzed comments.
+    Sentiment scores and like counts live in NumPy arrays, author names are
+    interned (so repeat commenters share one string), and texts and timestamps
+    are plain lists. Iterating over the table yields the same comment
+    dictionaries that get_youtube_comments returns, so existing callers
+    (CSV writers, extract_keywords, slicing for previews) keep working.
+    """
+
+    def __init__(self, comments=()):
+        self.authors = []
+        self.texts = []
+        self.published_at = []
+        self._arrays = {"like_count": np.empty(0, dtype=np.int64)}
+        self._arrays.update({field: np.empty(0, dtype=np.float64) for field in _SCORE_FIELDS})
+        # Numeric values appended since the arrays were last rebuilt
+        self._pending = {field: [] for field in self._arrays}
+        self.extend(comments)
+
+    @classmethod
+    def from_batches(cls, batches):
+        """Builds a table from an iterable of comment batches, e.g. iter_comment_batches(...)."""
+        table = cls()
+        for batch in batches:
+            table.extend(batch)
+        return table
+
+    def extend(self, comments):
+        """Appends comment dictionaries to the table."""
+        for comment in comments:
+            self.authors.append(sys.intern(comment["author"]))
+            self.texts.append(comment["text"])
+            self.published_at.append(comment["published_at"])
+            for field, values in self._pending.items():
+                values.append(comment[field])
+
+    def _column(self, field):
+        pending = self._pending[field]
+        if pending:
+            array = self._arrays[field]
+            self._arrays[field] = np.concatenate([array, np.asarray(pending, dtype=array.dtype)])
+            pending.clear()
+        return self._arrays[field]
+
+    @property
+    def like_count(self):
+        return self._column("like_count")
+
+    @property
+    def compound(self):
+        return self._column("sentiment_compound")
+
+    def column(self, field):
+        """Returns one column by its comment dictionary key (NumPy array for numeric fields)."""
+        if field == "author":
+            return self.authors
+        if field == "text":
+            return self.texts
+        if field == "published_at":
+            return self.published_at
+        return self._column(field)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        columns = [self.authors, self.texts, self.published_at]
+        columns += [self._column(field).tolist() for field in COMMENT_FIELDS[3:]]
+        for values in zip(*columns):
+            yield dict(zip(COMMENT_FIELDS, values))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.select(np.arange(len(self))[index])
+        row = {
+            "author": self.authors[index],
+            "text": self.texts[index],
+            "published_at": self.published_at[index],
+        }
+        for field in COMMENT_FIELDS[3:]:
+            row[field] = self._column(field)[index].item()
+        return row
+
+    def select(self, rows):
+        """Returns a new table with the rows picked by a boolean mask or an array of row indices."""
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        table = CommentTable()
+        table.authors = [self.authors[i] for i in rows]
+        table.texts = [self.texts[i] for i in rows]
+        table.published_at = [self.published_at[i] for i in rows]
+        for field in self._arrays:
+            table._arrays[field] = self._column(field)[rows]
+        return table
+
+    # --- Vectorized aggregates ---
+
+    def mean_compound(self):
+        """Average compound sentiment score (0.0 for an empty table)."""
+        return float(self.compound.mean()) if len(self) else 0.0
+
+    def sentiment_counts(self, positive=POSITIVE_THRESHOLD, negative=NEGATIVE_THRESHOLD):
+        """
+        Returns the (positive, neutral, negative) comment counts: compound >= positive,
+        between the thresholds, and compound <= negative.
+        """
+        compound = self.compound
+        positive_count = int(np.count_nonzero(compound >= positive))
+        negative_count = int(np.count_nonzero(compound <= negative))
+        return positive_count, len(compound) - positive_count - negative_count, negative_count
+
+    def like_weighted_sentiment(self):
+        """
+        Average compound score where each comment is weighted by 1 + its like count,
+        i.e. a like counts as agreeing with the comment.
+        """
+        if not len(self):
+            return 0.0
+        weights = self.like_count + 1
+        return float(np.dot(self.compound, weights) / weights.sum())
+
+    def memory_usage(self):
+        """Approximate number of bytes held by the table (arrays, lists and distinct strings)."""
+        total = sum(self._column(field).nbytes for field in self._arrays)
+        for strings in (self.authors, self.texts, self.published_at):
+            total += sys.getsizeof(strings)
+        total += sum(sys.getsizeof(author) for author in set(self.authors))
+        total += sum(sys.getsizeof(text) for text in self.texts)
+        total += sum(sys.getsizeof(published) for published in self.published_at)
+        return total
+
+
+class SentimentTally:
+    """
+    Running sentiment summary that is updated one batch of comments at a time
+    (e.g. per API page), so the cost of an update does not grow with the number
+    of comments seen so far. Gives the same figures as the CommentTable aggregates.
+    """
+
+    def __init__(self, positive=POSITIVE_THRESHOLD, negative=NEGATIVE_THRESHOLD):
+        self.positive = positive
+        self.negative = negative
+        self.count = 0
+        self.positive_count = 0
+        self.negative_count = 0
+        self.compound_sum = 0.0
+        self.weighted_sum = 0.0
+        self.weight_total = 0
+
+    def add(self, comments):
+        """Adds a batch of comment dictionaries to the tally."""
+        for comment in comments:
+            compound = comment["sentiment_compound"]
+            weight = comment["like_count"] + 1
+            self.count += 1
+            self.compound_sum += compound
+            self.weighted_sum += compound * weight
+            self.weight_total += weight
+            if compound >= self.positive:
+                self.positive_count += 1
+            elif compound <= self.negative:
+                self.negative_count += 1
+
+    def merge(self, other):
+        """Adds the counts of another tally (e.g. of another file) to this one."""
+        self.count += other.count
+        self.positive_count += other.positive_count
+        self.negative_count += other.negative_count
+        self.compound_sum += other.compound_sum
+        self.weighted_sum += other.weighted_sum
+        self.weight_total += other.weight_total
+
+    def mean_compound(self):
+        return self.compound_sum / self.count if self.count else 0.0
+
+    def sentiment_counts(self):
+        """Returns the (positive, neutral, negative) comment counts so far."""
+        neutral_count = self.count - self.positive_count - self.negative_count
+        return self.positive_count, neutral_count, self.negative_count
+
+    def like_weighted_sentiment(self):
+        return self.weighted_sum / self.weight_total if self.weight_total else 0.0
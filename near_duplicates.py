@@ -0,0 +1,191 @@
+import re
+import zlib
+
+import numpy as np
+
+from pipeline_profiler import profile_stage
+
+# Words of a comment for shingling: lowercase letters and digits in any script
+_WORD_RE = re.compile(r"\w+")
+# Mersenne prime 2**61 - 1 of the universal hash family used for the MinHash permutations
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+def comment_shingles(text):
+    """
+    Returns the normalized text of a comment and its word tokens. Texts without
+    any word (e.g. only emoji) are shingled as a whole, so they only match
+    exact copies.
+    """
+    tokens = _WORD_RE.findall(text.lower())
+    if not tokens:
+        tokens = [text.strip()]
+    return " ".join(tokens), tokens
+
+class NearDuplicateIndex:
+    """
+    Clusters near-duplicate comment texts (copy-paste spam, bots, "first")
+    with MinHash signatures and locality-sensitive hashing, in time roughly
+    linear in the number of comments instead of comparing every pair.
+
+    Each text is shingled into word pairs and summarized by a num_perm-value
+    MinHash signature; the signature is cut into `bands` bands and texts that
+    share a band become candidates. A candidate joins a cluster only if the
+    signatures agree on at least `threshold` of their values (an estimate of
+    the Jaccard similarity of the shingle sets). Exact repeats of a text are
+    matched by a dictionary before any hashing.
+
+    Rows are numbered in the order comments are added, so after adding the
+    same comments as a CommentTable holds, the masks below can be passed to
+    CommentTable.select to summarize with duplicates collapsed or excluded.
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.6, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        # Random multipliers that turn each band of a signature into one 64-bit bucket key
+        self._band_weights = rng.integers(1, 1 << 63, size=(bands, num_perm // bands), dtype=np.uint64)
+        self._keys = {} # Normalized text -> distinct text id
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32) # Rows beyond len(self._parent) are unused
+        self._parent = [] # Union-find forest over distinct text ids; a root is the first text of its cluster
+        self._buckets = [{} for _ in range(bands)] # Per band: bucket key -> first distinct text id
+        self._row_keys = [] # Distinct text id of every added comment
+
+    def __len__(self):
+        return len(self._row_keys)
+
+    def _find(self, key):
+        parent = self._parent
+        while parent[key] != key:
+            parent[key] = parent[parent[key]] # Path halving
+            key = parent[key]
+        return key
+
+    def _union(self, first, second):
+        first, second = self._find(first), self._find(second)
+        if first != second:
+            # The earlier text stays the root, so every cluster is named after its first comment
+            self._parent[max(first, second)] = min(first, second)
+
+    def _signatures_of(self, token_lists):
+        """MinHash signatures (one uint32 row per text) of the word-pair shingles of tokenized texts."""
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+        hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for tokens in token_lists for token in tokens),
+                             dtype=np.uint64, count=int(lengths.sum()))
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        # Shingle i combines words i and i+1. The last position of a text repeats the text's
+        # previous shingle (or is the word itself for one-word texts), which leaves the minimum unchanged.
+        shingles = hashes.copy()
+        shingles[:-1] = (hashes[:-1] * np.uint64(0x9E3779B1) + hashes[1:]) & _MAX_HASH
+        last = ends - 1
+        multi_word = lengths > 1
+        shingles[last[multi_word]] = shingles[last[multi_word] - 1]
+        shingles[last[~multi_word]] = hashes[last[~multi_word]]
+        # h(x) = (a*x + b) mod p, truncated to 32 bits, for every permutation at once
+        permuted = (shingles[:, None] * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return np.minimum.reduceat(permuted, starts, axis=0).astype(np.uint32)
+
+    def _band_keys(self, signatures):
+        rows = self.num_perm // self.bands
+        banded = signatures.astype(np.uint64).reshape(len(signatures), self.bands, rows)
+        return (banded * self._band_weights).sum(axis=2) # Wraps around modulo 2**64, which is fine for a hash
+
+    def add(self, comments, chunk_size=2000):
+        """Adds a batch of comment dictionaries (e.g. one API page) or a CommentTable."""
+        texts = getattr(comments, "texts", None)
+        if texts is None:
+            texts = [comment["text"] for comment in comments]
+        with profile_stage("near_duplicates", items=len(texts)):
+            self._add_texts(texts, chunk_size)
+
+    def _add_texts(self, texts, chunk_size):
+        new_keys = {}
+        for text in texts:
+            key, tokens = comment_shingles(text)
+            key_id = self._keys.get(key)
+            if key_id is None:
+                key_id = self._keys[key] = len(self._keys)
+                new_keys[key_id] = tokens
+            self._row_keys.append(key_id)
+
+        new_ids = list(new_keys)
+        for start in range(0, len(new_ids), chunk_size):
+            self._add_distinct(new_ids[start:start + chunk_size], [new_keys[key_id] for key_id in new_ids[start:start + chunk_size]])
+
+    def _add_distinct(self, key_ids, token_lists):
+        signatures = self._signatures_of(token_lists)
+        if key_ids[-1] >= len(self._signatures):
+            grown = np.empty((max(2 * len(self._signatures), key_ids[-1] + 1), self.num_perm), dtype=np.uint32)
+            grown[:len(self._parent)] = self._signatures[:len(self._parent)]
+            self._signatures = grown
+        self._signatures[key_ids[0]:key_ids[-1] + 1] = signatures
+        min_agreement = int(np.ceil(self.threshold * self.num_perm))
+
+        for key_id, signature, band_keys in zip(key_ids, signatures, self._band_keys(signatures).tolist()):
+            self._parent.append(key_id)
+            checked = set()
+            for buckets, band_key in zip(self._buckets, band_keys):
+                other = buckets.setdefault(band_key, key_id)
+                if other == key_id or other in checked:
+                    continue
+                checked.add(other)
+                if np.count_nonzero(self._signatures[other] == signature) >= min_agreement:
+                    self._union(key_id, other)
+
+    # --- Queries ---
+
+    def cluster_labels(self):
+        """Cluster of every comment row, as the row-independent id of the cluster's first text."""
+        roots = np.fromiter((self._find(key) for key in range(len(self._parent))), dtype=np.int64,
+                            count=len(self._parent))
+        return roots[np.asarray(self._row_keys, dtype=np.int64)]
+
+    def first_of_cluster_mask(self):
+        """True for the first comment of every cluster: select these to collapse duplicates into one comment."""
+        labels = self.cluster_labels()
+        mask = np.zeros(len(labels), dtype=bool)
+        mask[np.unique(labels, return_index=True)[1]] = True
+        return mask
+
+    def unique_mask(self):
+        """True for comments without any near-duplicate: select these to exclude duplicates altogether."""
+        labels = self.cluster_labels()
+        return np.bincount(labels)[labels] == 1
+
+    def largest_clusters(self, count=10, min_size=2):
+        """Returns (size, first row) of the `count` largest clusters with at least min_size comments."""
+        labels = self.cluster_labels()
+        if not len(labels):
+            return []
+        sizes = np.bincount(labels)
+        first_rows = np.full(len(sizes), -1, dtype=np.int64)
+        unique_labels, first_index = np.unique(labels, return_index=True)
+        first_rows[unique_labels] = first_index
+        order = np.argsort(-sizes, kind="stable")[:count]
+        return [(int(sizes[label]), int(first_rows[label])) for label in order if sizes[label] >= min_size]
+
+    def stats(self):
+        """Counts of comments, clusters and duplicates, and the cluster size distribution."""
+        labels = self.cluster_labels()
+        sizes = np.bincount(labels)
+        sizes = sizes[sizes > 0]
+        duplicated = sizes[sizes > 1]
+        size_counts = np.unique(duplicated, return_counts=True)
+        return {
+            "comments": len(labels),
+            "distinct_texts": len(self._parent),
+            "clusters": len(sizes),
+            "duplicate_clusters": len(duplicated),
+            "comments_in_duplicate_clusters": int(duplicated.sum()),
+            "redundant_comments": int(duplicated.sum() - len(duplicated)), # Dropped when collapsing
+            "largest_cluster": int(sizes.max()) if len(sizes) else 0,
+            # Cluster size -> number of clusters of that size (sizes of 2 or more)
+            "cluster_sizes": {int(size): int(count) for size, count in zip(*size_counts)},
+        }
@@ -0,0 +1,290 @@
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+try:
+    import resource # Not available on Windows
+except ImportError:
+    resource = None
+
+REPORT_VERSION = 1
+
+_active_profiler = contextvars.ContextVar("active_pipeline_profiler", default=None)
+
+def peak_rss_bytes(children=False):
+    """Peak resident set size of this process (or of its finished/waited-for children), or None if unknown."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+def _children_cpu_seconds():
+    """User plus system CPU seconds of this process's finished/waited-for children, or None if unknown."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+class _StageRecord:
+    """Handed out by stage(); set or increase `items` to report how much work the stage did."""
+
+    def __init__(self, items=0):
+        self.items = items
+
+class PipelineProfiler:
+    """
+    Collects the measurements of one run: wall time, CPU time and item counts
+    per stage (with the growth of peak RSS while the stage ran), named
+    counters, and the latency of every API page. report() returns them as a JSON-ready dictionary.
+
+    The pipeline reports through the module functions profile_stage(),
+    profile_count() and record_page(), which do nothing while no profiler is
+    active:
+
+        profiler = PipelineProfiler()
+        with profiler.activate():
+            comments = get_youtube_comments(url, api_key)
+        print(profiler.format_summary())
+        profiler.save("pipeline_profile.json")
+
+    The active profiler lives in a context variable, so concurrent Streamlit
+    sessions keep their numbers apart; threads started by the pipeline copy
+    the context so their work is recorded too. Stages that run on different
+    threads (e.g. prefetched API pages and scoring) overlap in time, so their
+    shares of the wall time can add up to more than 100%. A stage's CPU time
+    is that of the thread running it; work it hands to worker processes is
+    only in the run's cpu_children_seconds.
+    """
+
+    def __init__(self, label=None, clock=time.perf_counter):
+        self.label = label
+        self._clock = clock
+        self._started = clock()
+        self._cpu_started = time.process_time()
+        self._lock = threading.Lock()
+        self.stages = {} # Name -> {"seconds", "cpu_seconds", "calls", "items", "rss_growth_bytes"}
+        self.counters = {}
+        self.page_latencies = [] # Seconds per API page request
+        self.page_comments = 0
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Makes this the profiler the pipeline reports to, for the duration of the with block."""
+        token = _active_profiler.set(self)
+        try:
+            yield self
+        finally:
+            _active_profiler.reset(token)
+
+    def install(self):
+        """Activates this profiler for the rest of the current context (e.g. a whole script run)."""
+        _active_profiler.set(self)
+        return self
+
+    def _add_to_stage(self, name, seconds, items, rss_growth_bytes=0, cpu_seconds=0.0):
+        with self._lock:
+            totals = self.stages.setdefault(name, {"seconds": 0.0, "cpu_seconds": 0.0, "calls": 0, "items": 0,
+                                                   "rss_growth_bytes": 0})
+            totals["seconds"] += seconds
+            totals["cpu_seconds"] += cpu_seconds
+            totals["calls"] += 1
+            totals["items"] += items
+            totals["rss_growth_bytes"] += rss_growth_bytes
+
+    @contextlib.contextmanager
+    def stage(self, name, items=0):
+        """Times a block of work as (part of) the stage `name`; repeated blocks add up."""
+        record = _StageRecord(items)
+        rss_before = peak_rss_bytes()
+        cpu_start = time.thread_time()
+        start = self._clock()
+        try:
+            yield record
+        finally:
+            seconds = self._clock() - start
+            cpu_seconds = time.thread_time() - cpu_start
+            rss_growth = peak_rss_bytes() - rss_before if rss_before is not None else 0
+            self._add_to_stage(name, seconds, record.items, rss_growth, cpu_seconds)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_page(self, seconds, comments):
+        """Records one API page request (also counted as the "api_request" stage)."""
+        with self._lock:
+            self.page_latencies.append(seconds)
+            self.page_comments += comments
+        self._add_to_stage("api_request", seconds, comments)
+
+    def report(self):
+        """All measurements as a dictionary that can be saved as JSON and compared with compare_reports()."""
+        wall_seconds = self._clock() - self._started
+        cpu_seconds = time.process_time() - self._cpu_started
+        children_cpu = _children_cpu_seconds()
+        with self._lock:
+            stages = {
+                name: {
+                    "seconds": round(totals["seconds"], 6),
+                    "cpu_seconds": round(totals["cpu_seconds"], 6),
+                    "calls": totals["calls"],
+                    "items": totals["items"],
+                    "items_per_second": round(totals["items"] / totals["seconds"], 1) if totals["seconds"] > 0 else None,
+                    "rss_growth_mb": round(totals["rss_growth_bytes"] / 2**20, 2),
+                }
+                for name, totals in self.stages.items()
+            }
+            latencies = sorted(self.page_latencies)
+            counters = dict(self.counters)
+            page_comments = self.page_comments
+
+        def percentile(fraction):
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 2)
+
+        comments = counters.get("comments", 0)
+        rss = peak_rss_bytes()
+        children_rss = peak_rss_bytes(children=True)
+        return {
+            "version": REPORT_VERSION,
+            "label": self.label,
+            "wall_seconds": round(wall_seconds, 6),
+            "cpu_seconds": round(cpu_seconds, 6),
+            # Of worker processes that have exited (e.g. a closed scoring pool), over the whole process lifetime
+            "cpu_children_seconds": round(children_cpu, 6) if children_cpu is not None else None,
+            "comments": comments,
+            "comments_per_second": round(comments / wall_seconds, 1) if wall_seconds > 0 else None,
+            "peak_rss_mb": round(rss / 2**20, 1) if rss is not None else None,
+            "peak_rss_children_mb": round(children_rss / 2**20, 1) if children_rss is not None else None,
+            "stages": stages,
+            "counters": counters,
+            "pages": {
+                "count": len(latencies),
+                "comments": page_comments,
+                "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+                "p50_ms": percentile(0.5) if latencies else None,
+                "p95_ms": percentile(0.95) if latencies else None,
+                "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+            },
+            "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                            "cpus": os.cpu_count()},
+        }
+
+    def format_summary(self, report=None):
+        """A plain-text table of the report, for the CLI."""
+        report = report or self.report()
+        lines = ["--- Pipeline Profile ---",
+                 f"Wall time: {report['wall_seconds']:.2f} s   Comments: {report['comments']}   "
+                 f"Comments/s: {report['comments_per_second'] or 0:.0f}   CPU: {report.get('cpu_seconds', 0):.2f} s   "
+                 f"Peak RSS: {report['peak_rss_mb']} MB"]
+        pages = report["pages"]
+        if pages["count"]:
+            lines.append(f"API pages: {pages['count']}   latency mean {pages['mean_ms']:.0f} ms, "
+                         f"p50 {pages['p50_ms']:.0f} ms, p95 {pages['p95_ms']:.0f} ms, max {pages['max_ms']:.0f} ms")
+        lines.append(f"{'Stage':<18}{'Seconds':>9}{'CPU s':>9}{'Share':>8}{'Calls':>8}{'Items':>10}{'Items/s':>11}"
+                     f"{'RSS +MB':>9}")
+        wall = report["wall_seconds"] or 1
+        for name, totals in sorted(report["stages"].items(), key=lambda entry: -entry[1]["seconds"]):
+            lines.append(f"{name:<18}{totals['seconds']:>9.3f}{totals.get('cpu_seconds', 0):>9.3f}"
+                         f"{totals['seconds'] / wall:>8.0%}{totals['calls']:>8}"
+                         f"{totals['items']:>10}{totals['items_per_second'] or 0:>11.0f}{totals['rss_growth_mb']:>9.1f}")
+        if report["counters"]:
+            lines.append("Counters: " + ", ".join(f"{name}={value}" for name, value in sorted(report["counters"].items())))
+        return "\n".join(lines)
+
+    def save(self, path, report=None):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report or self.report(), file, indent=2)
+
+# --- Reporting hooks used by the pipeline ---
+
+_INACTIVE_STAGE = contextlib.nullcontext(_StageRecord())
+
+def current_profiler():
+    """The profiler activated in this context, or None."""
+    return _active_profiler.get()
+
+def profile_stage(name, items=0):
+    """Times a block as stage `name` of the active profiler; does nothing if none is active."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return _INACTIVE_STAGE
+    return profiler.stage(name, items)
+
+def profile_count(name, amount=1):
+    """Adds to counter `name` of the active profiler, if any."""
+    profiler = _active_profiler.get()
+    if profiler is not None:
+        profiler.count(name, amount)
+
+def record_page(seconds, comments):
+    """Records an API page request with the active profiler, if any."""
+    profiler = _active_profiler.get()
+    if profiler is not None:
+        profiler.record_page(seconds, comments)
+
+def profiled(name):
+    """Decorator that times every call of a function as stage `name` of the active profiler."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with profile_stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# --- Baseline comparison ---
+
+def compare_reports(current, baseline, tolerance=0.25, min_seconds=0.05):
+    """
+    Compares a report with a baseline report and returns a list of regressions
+    (empty if there are none): stages more than `tolerance` slower (ignoring
+    stages shorter than min_seconds in the baseline), lower comments/s, slower
+    p95 page latency, or higher peak RSS.
+    """
+    regressions = []
+
+    def worse(name, now, before, higher_is_worse=True):
+        if now is None or before is None or before == 0:
+            return
+        change = (now - before) / before
+        if (change > tolerance) if higher_is_worse else (change < -tolerance):
+            regressions.append(f"{name}: {before} -> {now} ({change:+.0%})")
+
+    for name, before in baseline.get("stages", {}).items():
+        now = current.get("stages", {}).get(name)
+        if now is not None and before["seconds"] >= min_seconds:
+            worse(f"stage {name} seconds", now["seconds"], before["seconds"])
+    worse("comments_per_second", current.get("comments_per_second"), baseline.get("comments_per_second"),
+          higher_is_worse=False)
+    worse("pages p95_ms", current.get("pages", {}).get("p95_ms"), baseline.get("pages", {}).get("p95_ms"))
+    worse("peak_rss_mb", current.get("peak_rss_mb"), baseline.get("peak_rss_mb"))
+    return regressions
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare a pipeline profile report with a baseline report.")
+    parser.add_argument("report", help="JSON report of the run to check")
+    parser.add_argument("baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown (default: %(default)s)")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="Ignore stages shorter than this in the baseline (default: %(default)s)")
+    args = parser.parse_args()
+
+    with open(args.report, encoding="utf-8") as file:
+        current_report = json.load(file)
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline_report = json.load(file)
+    found = compare_reports(current_report, baseline_report, args.tolerance, args.min_seconds)
+    for regression in found:
+        print(f"REGRESSION {regression}")
+    if found:
+        sys.exit(1)
+    print(f"No regressions beyond {args.tolerance:.0%} compared with {args.baseline}.")
@@ -0,0 +1,128 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from comment_table import NEGATIVE_THRESHOLD, POSITIVE_THRESHOLD, SentimentTally
+from pipeline_profiler import profile_stage
+
+HOUR = 3600
+DAY = 24 * HOUR
+# Bucket sizes tried, smallest first, when choosing one for a trend chart
+ROLLUP_SECONDS = [HOUR, 3 * HOUR, 6 * HOUR, 12 * HOUR, DAY, 7 * DAY, 30 * DAY]
+
+def to_timestamp(value):
+    """
+    Converts a published_at string ("2025-06-22T10:15:00Z"), a datetime or a
+    number of seconds since the epoch to epoch seconds (naive times are UTC).
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+def bucket_label(seconds):
+    """Readable bucket size, e.g. "6 hours" or "1 day"."""
+    for unit_seconds, unit in ((DAY, "day"), (HOUR, "hour"), (60, "minute")):
+        if seconds % unit_seconds == 0:
+            count = seconds // unit_seconds
+            return f"{count} {unit}{'s' if count != 1 else ''}"
+    return f"{seconds} seconds"
+
+class SentimentIndex:
+    """
+    Comments binned by publication time into fixed buckets of bucket_seconds,
+    each holding a SentimentTally (counts, compound sums and like-weighted
+    sums). Pages are added as they arrive, and range and rollup queries merge
+    the buckets instead of rescanning the comments, so they cost
+    O(number of buckets) whatever the number of comments.
+    Comments without a readable published_at are counted in `undated` only.
+    """
+
+    def __init__(self, bucket_seconds=HOUR, positive=POSITIVE_THRESHOLD, negative=NEGATIVE_THRESHOLD):
+        self.bucket_seconds = bucket_seconds
+        self.positive = positive
+        self.negative = negative
+        self.buckets = {} # Bucket start (epoch seconds) -> SentimentTally
+        self.undated = 0
+
+    def _tally(self):
+        return SentimentTally(self.positive, self.negative)
+
+    def _bucket(self, timestamp):
+        return timestamp - timestamp % self.bucket_seconds
+
+    def add(self, comments):
+        """Adds a batch of comment dictionaries (e.g. one API page) to the index."""
+        with profile_stage("time_index", items=len(comments)):
+            groups = defaultdict(list)
+            for comment in comments:
+                try:
+                    groups[self._bucket(to_timestamp(comment["published_at"]))].append(comment)
+                except (KeyError, TypeError, ValueError):
+                    self.undated += 1
+            for bucket, bucket_comments in groups.items():
+                tally = self.buckets.get(bucket)
+                if tally is None:
+                    tally = self.buckets[bucket] = self._tally()
+                tally.add(bucket_comments)
+
+    def __len__(self):
+        """Number of dated comments in the index."""
+        return sum(tally.count for tally in self.buckets.values())
+
+    def first_published(self):
+        """Start of the earliest bucket as a UTC datetime, or None for an empty index."""
+        if not self.buckets:
+            return None
+        return datetime.fromtimestamp(min(self.buckets), timezone.utc)
+
+    def range(self, start=None, end=None):
+        """
+        Returns a SentimentTally of the comments published in [start, end)
+        (datetimes, published_at strings or epoch seconds; None for open ends).
+        Both ends are rounded down to bucket boundaries.
+        """
+        start = None if start is None else self._bucket(to_timestamp(start))
+        end = None if end is None else self._bucket(to_timestamp(end))
+        result = self._tally()
+        for bucket, tally in self.buckets.items():
+            if (start is None or bucket >= start) and (end is None or bucket < end):
+                result.merge(tally)
+        return result
+
+    def first(self, seconds):
+        """SentimentTally of the comments published within `seconds` of the first comment, e.g. first(DAY)."""
+        if not self.buckets:
+            return self._tally()
+        start = min(self.buckets)
+        return self.range(start, start + seconds)
+
+    def rollup(self, bucket_seconds=None):
+        """
+        Merges the buckets into coarser ones of bucket_seconds (a multiple of the
+        index's bucket size; default: the index's own) and returns them as a
+        time-ordered list of (UTC datetime of the bucket start, SentimentTally).
+        """
+        bucket_seconds = bucket_seconds or self.bucket_seconds
+        if bucket_seconds % self.bucket_seconds:
+            raise ValueError(f"Rollup size {bucket_seconds}s is not a multiple of the bucket size {self.bucket_seconds}s")
+        merged = {}
+        for bucket, tally in self.buckets.items():
+            rolled = bucket - bucket % bucket_seconds
+            if rolled not in merged:
+                merged[rolled] = self._tally()
+            merged[rolled].merge(tally)
+        return [(datetime.fromtimestamp(bucket, timezone.utc), merged[bucket]) for bucket in sorted(merged)]
+
+    def suggest_rollup(self, max_points=60):
+        """Smallest bucket size from ROLLUP_SECONDS that shows the whole time span in at most max_points buckets."""
+        if not self.buckets:
+            return self.bucket_seconds
+        span = max(self.buckets) - min(self.buckets) + self.bucket_seconds
+        for seconds in ROLLUP_SECONDS:
+            if seconds % self.bucket_seconds == 0 and span / seconds <= max_points:
+                return seconds
+        return math.ceil(span / max_points / self.bucket_seconds) * self.bucket_seconds
@@ -0,0 +1,43 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks")) # fake_youtube_api and synthetic
+
+import pytest
+
+import youtube_analyzer
+
+VIDEO_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+VIDEO_ID = "dQw4w9WgXcQ"
+
+@pytest.fixture(autouse=True)
+def fast_scheduler(monkeypatch):
+    """No rate limiting or retry backoff in tests; the stubs fail on purpose."""
+    # The fetch functions take the default scheduler as a default argument, so patch the instance itself
+    scheduler = youtube_analyzer.default_scheduler
+    monkeypatch.setattr(scheduler.bucket, "rate", 1e6)
+    monkeypatch.setattr(scheduler, "max_retries", 0)
+    monkeypatch.setattr(scheduler, "_sleep", lambda seconds: None)
+    return scheduler
+
+@pytest.fixture
+def scored_texts(monkeypatch):
+    """Records every text the fetch hands to score_comments (not again for its own call on score cache misses)."""
+    texts = []
+    depth = [0]
+    score_comments = youtube_analyzer.score_comments
+
+    def recording_score_comments(batch, *args, **kwargs):
+        batch = list(batch)
+        if not depth[0]:
+            texts.extend(batch)
+        depth[0] += 1
+        try:
+            return score_comments(batch, *args, **kwargs)
+        finally:
+            depth[0] -= 1
+
+    monkeypatch.setattr(youtube_analyzer, "score_comments", recording_score_comments)
+    return texts
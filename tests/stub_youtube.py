@@ -0,0 +1,61 @@
+"""
+In-memory stand-in for a googleapiclient YouTube client, for tests that need
+full control over the comments of a video and over which pages fail.
+"""
+
+class _Request:
+    def __init__(self, run):
+        self._run = run
+
+    def execute(self):
+        return self._run()
+
+class StubYouTube:
+    """
+    A video whose comments are served newest first by commentThreads().list,
+    `per_page` per page. post() publishes new comments; pages whose number is
+    in `failing_pages` raise `failure` (RuntimeError unless set to another
+    exception class). Every request is counted.
+    """
+
+    failure = RuntimeError
+
+    def __init__(self, count=0, per_page=3):
+        self.per_page = per_page
+        self.items = [] # Newest first
+        self.failing_pages = set()
+        self.requests = 0
+        self.post(count)
+
+    def post(self, count):
+        """Publishes `count` new comments, one minute apart and newer than all earlier ones."""
+        start = len(self.items)
+        new_items = [self._item(index) for index in range(start, start + count)]
+        self.items = new_items[::-1] + self.items
+
+    @staticmethod
+    def _item(index):
+        snippet = {
+            "authorDisplayName": f"@user{index}",
+            "textDisplay": f"comment number {index}, I love this video",
+            "publishedAt": f"2025-06-{1 + index // 1440:02d}T{index // 60 % 24:02d}:{index % 60:02d}:00Z",
+            "likeCount": index % 5,
+        }
+        return {"id": f"c{index}", "snippet": {"totalReplyCount": 0,
+                                               "topLevelComment": {"id": f"c{index}", "snippet": snippet}}}
+
+    def commentThreads(self):
+        return self
+
+    def list(self, **params):
+        def run():
+            self.requests += 1
+            start = int(params.get("pageToken") or 0)
+            if start // self.per_page in self.failing_pages:
+                raise self.failure(f"page {start // self.per_page} failed")
+            size = min(self.per_page, params["maxResults"], len(self.items) - start)
+            response = {"items": self.items[start:start + size]}
+            if start + size < len(self.items):
+                response["nextPageToken"] = str(start + size)
+            return response
+        return _Request(run)
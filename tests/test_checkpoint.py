@@ -0,0 +1,50 @@
+import pytest
+
+from youtube_analyzer import get_youtube_comments
+from youtube_scheduler import FetchCheckpoint
+
+from conftest import VIDEO_ID, VIDEO_URL
+from stub_youtube import StubYouTube
+
+def test_interrupted_fetch_resumes_from_checkpoint(tmp_path, scored_texts):
+    youtube = StubYouTube(10)
+    youtube.failing_pages = {2}
+    checkpoint = FetchCheckpoint()
+    comments = get_youtube_comments(VIDEO_URL, "key", 100, youtube=youtube, score_cache=None, checkpoint=checkpoint)
+    assert len(comments) == 6
+    assert (checkpoint.video_id, checkpoint.page_token, checkpoint.complete) == (VIDEO_ID, "6", False)
+
+    # The checkpoint survives a restart as JSON
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint.save(path)
+    checkpoint = FetchCheckpoint.load(path)
+
+    youtube.failing_pages = set()
+    youtube.requests = 0
+    scored_texts.clear()
+    batch_sizes = []
+    comments = get_youtube_comments(VIDEO_URL, "key", 100, youtube=youtube, score_cache=None, checkpoint=checkpoint,
+                                    on_batch=lambda batch: batch_sizes.append(len(batch)))
+    assert [comment["author"] for comment in comments] == [f"@user{index}" for index in range(9, -1, -1)]
+    assert youtube.requests == 2 # Pages 2 and 3 only
+    assert len(scored_texts) == 4
+    # on_batch first gets the resumed comments, then the new pages
+    assert batch_sizes == [6, 3, 1]
+    assert checkpoint.complete
+    assert checkpoint.comments == [] # The completed checkpoint does not keep the comments alive
+
+def test_checkpoint_of_another_video_starts_over():
+    checkpoint = FetchCheckpoint("otherVideo1", page_token="30", comments=[{"text": "old"}])
+    youtube = StubYouTube(4)
+    comments = get_youtube_comments(VIDEO_URL, "key", 100, youtube=youtube, score_cache=None, checkpoint=checkpoint)
+    assert len(comments) == 4
+    assert checkpoint.video_id == VIDEO_ID
+
+def test_on_batch_errors_are_not_fetch_errors():
+    def failing_on_batch(batch):
+        raise OSError("disk full")
+
+    checkpoint = FetchCheckpoint()
+    with pytest.raises(OSError):
+        get_youtube_comments(VIDEO_URL, "key", 100, youtube=StubYouTube(10), score_cache=None, checkpoint=checkpoint,
+                             on_batch=failing_on_batch)
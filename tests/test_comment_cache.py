@@ -0,0 +1,165 @@
+import itertools
+import types
+
+import pytest
+
+import comment_cache
+from comment_cache import CommentCache
+from youtube_analyzer import get_youtube_comments_cached
+
+from conftest import VIDEO_ID, VIDEO_URL
+from stub_youtube import StubYouTube
+
+@pytest.fixture
+def cache(tmp_path):
+    with CommentCache(str(tmp_path / "comments.sqlite3")) as comment_cache:
+        yield comment_cache
+
+def texts(comments):
+    return [comment["text"] for comment in comments]
+
+def posted_texts(youtube, count=None):
+    """Texts of the stub's comments, newest first."""
+    return [item["snippet"]["topLevelComment"]["snippet"]["textDisplay"] for item in youtube.items[:count]]
+
+def test_refresh_fetches_only_new_comments(cache, scored_texts):
+    youtube = StubYouTube(5)
+    assert len(get_youtube_comments_cached(VIDEO_URL, "key", cache, 100, youtube=youtube)) == 5
+
+    youtube.post(4)
+    scored_texts.clear()
+    youtube.requests = 0
+    comments = get_youtube_comments_cached(VIDEO_URL, "key", cache, 100, youtube=youtube)
+    assert texts(comments) == posted_texts(youtube) # Newest first, nothing missing
+    # The 4 new comments fit on 2 pages; older pages are not fetched, and of the cached comments
+    # only the newest (published at the boundary second) is scored again
+    assert youtube.requests == 2
+    assert scored_texts == posted_texts(youtube, 5)
+
+def test_refresh_without_new_comments_scores_nothing(cache, scored_texts):
+    youtube = StubYouTube(7)
+    get_youtube_comments_cached(VIDEO_URL, "key", cache, 100, youtube=youtube)
+    scored_texts.clear()
+    youtube.requests = 0
+    assert len(get_youtube_comments_cached(VIDEO_URL, "key", cache, 100, youtube=youtube)) == 7
+    assert youtube.requests == 1
+    # Only the comment published at the same second as the newest cached one is looked at again
+    assert len(scored_texts) == 1
+
+def test_failed_refresh_leaves_no_gap(cache):
+    youtube = StubYouTube(5)
+    get_youtube_comments_cached(VIDEO_URL, "key", cache, 100, youtube=youtube)
+
+    youtube.post(9)
+    youtube.failing_pages = {1}
+    # The first page of new comments arrived, but the refresh never reached the cached ones
+    assert len(get_youtube_comments_cached(VIDEO_URL, "key", cache, 100, youtube=youtube)) == 5
+
+    youtube.failing_pages = set()
+    comments = get_youtube_comments_cached(VIDEO_URL, "key", cache, 100, youtube=youtube)
+    assert texts(comments) == posted_texts(youtube)
+
+def test_shallow_cache_is_fetched_again_for_more_comments(cache):
+    youtube = StubYouTube(20)
+    assert len(get_youtube_comments_cached(VIDEO_URL, "key", cache, 3, youtube=youtube)) == 3
+    assert cache.fetch_depth(VIDEO_ID) == (3, False)
+
+    comments = get_youtube_comments_cached(VIDEO_URL, "key", cache, 10, youtube=youtube)
+    assert texts(comments) == posted_texts(youtube, 10)
+    assert cache.fetch_depth(VIDEO_ID) == (10, False)
+
+    # A smaller request is served from the deeper cache without a full fetch
+    youtube.requests = 0
+    assert len(get_youtube_comments_cached(VIDEO_URL, "key", cache, 5, youtube=youtube)) == 5
+    assert youtube.requests == 1
+
+def test_video_with_fewer_comments_than_requested_is_cached_completely(cache):
+    youtube = StubYouTube(4)
+    get_youtube_comments_cached(VIDEO_URL, "key", cache, 3, youtube=youtube)
+    get_youtube_comments_cached(VIDEO_URL, "key", cache, 10, youtube=youtube)
+    assert cache.fetch_depth(VIDEO_ID) == (4, True)
+    assert cache.covers(VIDEO_ID, 35000)
+
+def test_skipped_malformed_comments_do_not_mark_the_video_complete(cache):
+    youtube = StubYouTube(20)
+    del youtube.items[1]["snippet"]["topLevelComment"]["snippet"]["publishedAt"]
+    assert len(get_youtube_comments_cached(VIDEO_URL, "key", cache, 10, youtube=youtube)) == 9
+    # Fewer comments than asked for, but the video has more pages
+    assert cache.fetch_depth(VIDEO_ID) == (9, False)
+    assert not cache.covers(VIDEO_ID, 10)
+
+def test_refresh_with_more_new_comments_than_requested(cache):
+    youtube = StubYouTube(5)
+    get_youtube_comments_cached(VIDEO_URL, "key", cache, 10, youtube=youtube)
+    youtube.post(30)
+    comments = get_youtube_comments_cached(VIDEO_URL, "key", cache, 10, youtube=youtube)
+    assert texts(comments) == posted_texts(youtube, 10)
+    # The refresh stopped before the old comments, so only the contiguous new ones are kept
+    assert cache.fetch_depth(VIDEO_ID) == (10, False)
+    assert len(cache.get(VIDEO_ID)) == 10
+
+def test_cache_from_before_fetch_depths_is_fetched_again(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    with CommentCache(path) as cache:
+        get_youtube_comments_cached(VIDEO_URL, "key", cache, 3, youtube=StubYouTube(10))
+        # Recreate the videos table as it was before fetch depths were recorded
+        with cache._conn:
+            cache._conn.executescript("""
+                DROP TABLE videos;
+                CREATE TABLE videos (video_id TEXT PRIMARY KEY, last_access REAL NOT NULL);
+                INSERT INTO videos VALUES ('dQw4w9WgXcQ', 0);
+            """)
+    with CommentCache(path) as cache:
+        assert cache.fetch_depth(VIDEO_ID) == (0, False)
+        assert not cache.covers(VIDEO_ID, 3)
+        youtube = StubYouTube(10)
+        assert len(get_youtube_comments_cached(VIDEO_URL, "key", cache, 3, youtube=youtube)) == 3
+        assert cache.fetch_depth(VIDEO_ID) == (3, False)
+
+def cached_comments(count, prefix):
+    """Comments with long texts, so a few hundred of them take up a noticeable part of the cache file."""
+    return [{"author": f"@{prefix}{index}", "text": f"{prefix} {index} " + "x" * 1000,
+             "published_at": f"2025-06-01T00:{index // 60 % 60:02d}:{index % 60:02d}Z", "like_count": 0,
+             "sentiment_compound": 0.0, "sentiment_pos": 0.0, "sentiment_neu": 1.0, "sentiment_neg": 0.0}
+            for index in range(count)]
+
+@pytest.fixture
+def ticking_clock(monkeypatch):
+    """Makes every access to the cache one second later than the previous one."""
+    monkeypatch.setattr(comment_cache, "time", types.SimpleNamespace(time=itertools.count().__next__))
+
+def test_invalidate_drops_one_video_or_all(cache):
+    for video_id in ("videoAAAAAA", "videoBBBBBB"):
+        cache.add(video_id, cached_comments(5, video_id))
+        cache.set_fetch_depth(video_id, 5, fetched_all=True)
+
+    cache.invalidate("videoAAAAAA")
+    assert cache.get("videoAAAAAA") == []
+    assert cache.fetch_depth("videoAAAAAA") is None
+    assert not cache.has_video("videoAAAAAA")
+    assert len(cache.get("videoBBBBBB")) == 5
+
+    cache.invalidate()
+    assert not cache.has_video("videoBBBBBB")
+    assert cache.newest_published_at("videoBBBBBB") is None
+
+def test_evict_drops_least_recently_used_videos(cache, ticking_clock):
+    for video_id in ("videoAAAAAA", "videoBBBBBB", "videoCCCCCC"):
+        cache.add(video_id, cached_comments(200, video_id))
+    cache.get("videoAAAAAA") # Now B is the least recently used
+
+    assert cache.evict(max_bytes=cache.size_bytes() - 1) == ["videoBBBBBB"]
+    assert cache.evict(max_bytes=0, keep="videoAAAAAA") == ["videoCCCCCC"]
+    assert cache.has_video("videoAAAAAA") and len(cache.get("videoAAAAAA")) == 200
+
+def test_add_keeps_the_cache_under_its_size_cap(tmp_path, ticking_clock):
+    with CommentCache(str(tmp_path / "small.sqlite3"), max_bytes=None) as cache:
+        cache.add("videoAAAAAA", cached_comments(200, "videoAAAAAA"))
+        one_video = cache.size_bytes()
+    with CommentCache(str(tmp_path / "capped.sqlite3"), max_bytes=int(one_video * 2.5)) as cache:
+        for video_id in ("videoAAAAAA", "videoBBBBBB", "videoCCCCCC"):
+            cache.add(video_id, cached_comments(200, video_id))
+        # The oldest video made room for the newest
+        assert not cache.has_video("videoAAAAAA")
+        assert cache.has_video("videoBBBBBB") and cache.has_video("videoCCCCCC")
+        assert cache.size_bytes() <= cache.max_bytes
@@ -0,0 +1,124 @@
+import pytest
+
+import youtube_analyzer
+from youtube_analyzer import fetch_comments_for_videos
+
+from fake_youtube_api import FakeYouTubeAPI, start_server
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """The fake API server on a free port, with the analyzer pointed at it."""
+    api = FakeYouTubeAPI(250, replies=3, reply_share=0.2)
+    server, endpoint = start_server(api)
+    monkeypatch.setenv("YOUTUBE_API_ENDPOINT", endpoint)
+    yield api
+    server.shutdown()
+    server.server_close()
+
+def fail_requests(monkeypatch, fake_api, should_fail, error=(403, "quotaExceeded")):
+    """Makes the fake API fail the requests for which should_fail(query parameters) is true."""
+    failure = fake_api.failure
+
+    def failing(params=None):
+        if should_fail(params):
+            fake_api.requests += 1
+            return error
+        return failure(params)
+
+    monkeypatch.setattr(fake_api, "failure", failing)
+
+def assert_threads(fake_api, video_id, comments, thread_count):
+    """Checks that `comments` are the newest thread_count threads of a video, each followed by all its replies."""
+    reply_counts = [fake_api.reply_count(video_id, index) for index in range(thread_count)]
+    assert len(comments) == thread_count + sum(reply_counts)
+    # Threads come newest first, each followed by its replies (published after it)
+    threads = []
+    position = 0
+    for reply_count in reply_counts:
+        thread = comments[position:position + 1 + reply_count]
+        assert all(reply["published_at"] > thread[0]["published_at"] for reply in thread[1:])
+        threads.append(thread[0]["published_at"])
+        position += 1 + reply_count
+    assert threads == sorted(threads, reverse=True)
+    assert len(set(threads)) == thread_count
+
+def test_replies_follow_their_threads(fake_api):
+    results = fetch_comments_for_videos(["https://youtu.be/fakeVideo01", "https://youtu.be/fakeVideo02"], "key",
+                                        max_comments=150, include_replies=True, score_cache=None, concurrency=3)
+    for video_id, comments in results.items():
+        assert_threads(fake_api, video_id, comments, 150)
+        assert all("sentiment_compound" in comment for comment in comments)
+
+def test_failed_video_resumes_from_its_checkpoint(fake_api):
+    checkpoints = {}
+    fake_api.quota_after = 1 # The second page request of the video fails
+    results = fetch_comments_for_videos(["https://youtu.be/fakeVideo01"], "key", max_comments=250,
+                                        score_cache=None, checkpoints=checkpoints)
+    assert len(results["fakeVideo01"]) == 100
+    assert not checkpoints["fakeVideo01"].complete
+
+    fake_api.quota_after = None
+    requests_before = fake_api.requests
+    results = fetch_comments_for_videos(["https://youtu.be/fakeVideo01"], "key", max_comments=250,
+                                        score_cache=None, checkpoints=checkpoints)
+    comments = results["fakeVideo01"]
+    assert len(comments) == 250
+    assert len({(comment["published_at"], comment["text"]) for comment in comments}) == 250
+    assert fake_api.requests - requests_before == 2 # Only the pages after the checkpoint
+    assert checkpoints["fakeVideo01"].complete and checkpoints["fakeVideo01"].comments == []
+
+def test_resumed_video_with_replies_gets_all_its_threads(fake_api, monkeypatch):
+    failed = []
+
+    def second_page_once(params):
+        # Replies of the first page are already in the checkpoint when the second page fails
+        if params.get("pageToken") != "100" or failed:
+            return False
+        failed.append(params)
+        return True
+
+    fail_requests(monkeypatch, fake_api, second_page_once)
+    checkpoints = {}
+    results = fetch_comments_for_videos(["https://youtu.be/fakeVideo01"], "key", max_comments=150,
+                                        include_replies=True, score_cache=None, checkpoints=checkpoints)
+    assert_threads(fake_api, "fakeVideo01", results["fakeVideo01"], 100)
+    assert checkpoints["fakeVideo01"].thread_count == 100
+
+    results = fetch_comments_for_videos(["https://youtu.be/fakeVideo01"], "key", max_comments=150,
+                                        include_replies=True, score_cache=None, checkpoints=checkpoints)
+    # max_comments counts top-level comments only, as without the interruption
+    assert_threads(fake_api, "fakeVideo01", results["fakeVideo01"], 150)
+    assert checkpoints["fakeVideo01"].complete
+
+def test_failed_replies_are_fetched_again(fake_api, monkeypatch):
+    parent_index = next(index for index in range(100) if fake_api.reply_count("fakeVideo01", index))
+    parent_id = f"fakeVideo01.{parent_index}"
+    failed = []
+    fail_requests(monkeypatch, fake_api, lambda params: params.get("parentId") == parent_id and not failed,
+                  error=(404, "commentNotFound"))
+    checkpoints = {}
+    comments = fetch_comments_for_videos(["https://youtu.be/fakeVideo01"], "key", max_comments=100,
+                                         include_replies=True, score_cache=None, checkpoints=checkpoints)["fakeVideo01"]
+    checkpoint = checkpoints["fakeVideo01"]
+    assert len(comments) == 100 + sum(fake_api.reply_count("fakeVideo01", index) for index in range(100)) \
+        - fake_api.reply_count("fakeVideo01", parent_index)
+    assert checkpoint.complete
+    assert len(checkpoint.failed_replies) == 1 and checkpoint.failed_replies[0][0] == parent_id
+    assert checkpoint.comments == comments # Kept until the replies have been fetched
+
+    failed.append(parent_id)
+    requests_before = fake_api.requests
+    comments = fetch_comments_for_videos(["https://youtu.be/fakeVideo01"], "key", max_comments=100,
+                                         include_replies=True, score_cache=None, checkpoints=checkpoints)["fakeVideo01"]
+    assert_threads(fake_api, "fakeVideo01", comments, 100)
+    assert fake_api.requests - requests_before == 1 # Only the missing replies
+    assert checkpoint.failed_replies == [] and checkpoint.comments == []
+
+def test_client_proxy_is_used_for_every_request(fake_api):
+    # All requests, replies included, go through the shared scheduler
+    scheduler = youtube_analyzer.default_scheduler
+    requests_before = scheduler.requests
+    fetch_comments_for_videos(["https://youtu.be/fakeVideo03"], "key", max_comments=100, include_replies=True,
+                              score_cache=None)
+    threads_with_replies = sum(1 for index in range(100) if fake_api.reply_count("fakeVideo03", index))
+    assert scheduler.requests - requests_before == 1 + threads_with_replies
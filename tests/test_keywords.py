@@ -0,0 +1,59 @@
+import random
+import re
+from collections import Counter
+
+import pytest
+
+from youtube_analyzer import count_keywords, extract_keywords
+
+from synthetic import synthetic_texts
+
+# Tricky input for the tokenizer: contractions, the words Treebank splits, punctuation, digits and non-ASCII text
+_EDGE_CASES = [
+    "I cannot believe it, gonna watch again!! wanna see more, gotta go... lemme know, gimme more",
+    "Don't stop!!! It's the BEST video... ever?! 10/10",
+    "ça c'est très bien 😂😂 naïve café",
+    "C.I.A. and U.S.A. -- e-mail me at test@example.com",
+    "'quoted' \"double\" (parens) [brackets] {braces} hashtag#tag",
+    "  spaces   and\ttabs\nand newlines  ",
+    "a b c d e single letters x y z",
+    "",
+]
+
+def word_tokenize_keywords(comments, num_keywords=10):
+    """The keyword extraction as it was before it dropped word_tokenize, kept as the reference."""
+    nltk = pytest.importorskip("nltk")
+    from nltk.corpus import stopwords
+    try:
+        stop_words = set(stopwords.words("english"))
+    except LookupError:
+        pytest.skip("NLTK stopwords data is not installed")
+
+    all_words = []
+    for comment in comments:
+        text = comment["text"].lower()
+        # Without punctuation left there is a single "sentence", so preserve_line=True gives
+        # word_tokenize's exact output without needing the punkt sentence splitter data
+        words = nltk.word_tokenize(re.sub(r"[^a-zA-Z\s]", "", text), preserve_line=True)
+        all_words.extend(word for word in words if word not in stop_words and len(word) > 1)
+    return Counter(all_words).most_common(num_keywords)
+
+def test_keywords_match_word_tokenize():
+    texts = _EDGE_CASES + synthetic_texts(3000)
+    rng = random.Random(1)
+    texts += [" ".join(rng.choice(_EDGE_CASES).split()[::-1]) for _ in range(200)]
+    comments = [{"text": text} for text in texts]
+    expected = word_tokenize_keywords(comments, num_keywords=50)
+    assert extract_keywords(comments, num_keywords=50) == expected
+    # Ties keep the first-seen order too, so the full ranking matches
+    assert extract_keywords(comments, num_keywords=10) == expected[:10]
+
+def test_treebank_splits_match_word_tokenize():
+    comments = [{"text": text} for text in _EDGE_CASES]
+    assert extract_keywords(comments, num_keywords=100) == word_tokenize_keywords(comments, num_keywords=100)
+
+def test_parallel_count_matches_serial():
+    comments = [{"text": text} for text in synthetic_texts(5000)]
+    parallel = count_keywords(comments, workers=2, chunk_size=1000)
+    serial = count_keywords(comments)
+    assert parallel.most_common() == serial.most_common()
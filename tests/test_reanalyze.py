@@ -0,0 +1,52 @@
+import os
+
+from comment_export import read_comment_batches, write_comments
+from youtube_analyzer import reanalyze_comment_files, score_comments
+
+def saved_comments(count, compound=0.5):
+    """Comments as a saved file holds them, with outdated scores."""
+    return [{"author": f"@user{index}", "text": f"comment {index}, I love this video" if index % 2 else "terrible audio",
+             "published_at": f"2025-06-01T00:00:{index % 60:02d}Z", "like_count": index, "sentiment_compound": compound,
+             "sentiment_pos": 0.0, "sentiment_neu": 1.0, "sentiment_neg": 0.0} for index in range(count)]
+
+def read_all(path):
+    return [row for batch in read_comment_batches(path) for row in batch]
+
+def test_rescored_files_round_trip(tmp_path):
+    comments = saved_comments(25)
+    for name in ("x.csv", "x.jsonl"):
+        write_comments(comments, str(tmp_path / name))
+    report = reanalyze_comment_files([str(tmp_path / "x.csv"), str(tmp_path / "x.jsonl")], workers=1,
+                                     output_dir=str(tmp_path / "out"))
+    assert report["total"]["comments"] == 50
+    expected = [scores["compound"] for scores in score_comments([comment["text"] for comment in comments])]
+    for name in ("x.csv", "x.jsonl"):
+        rows = read_all(str(tmp_path / "out" / name))
+        assert [row["text"] for row in rows] == [comment["text"] for comment in comments]
+        assert [row["sentiment_compound"] for row in rows] == expected
+
+def test_input_directory_as_output_keeps_the_input(tmp_path):
+    path = tmp_path / "x.csv"
+    write_comments(saved_comments(25), str(path))
+    original = path.read_bytes()
+    report = reanalyze_comment_files([str(tmp_path)], workers=1, output_dir=str(tmp_path))
+    assert path.read_bytes() == original
+    assert report["total"]["comments"] == 25
+    assert len(read_all(str(tmp_path / "x_1.csv"))) == 25
+
+def test_same_names_get_free_suffixes(tmp_path):
+    inputs = [tmp_path / "a" / "x_2.csv", tmp_path / "b" / "x.csv", tmp_path / "c" / "x.csv"]
+    for path in inputs:
+        path.parent.mkdir()
+        write_comments(saved_comments(3), str(path))
+    reanalyze_comment_files([str(path) for path in inputs], workers=1, output_dir=str(tmp_path / "out"))
+    assert sorted(os.listdir(tmp_path / "out")) == ["x.csv", "x_1.csv", "x_2.csv"]
+
+def test_failed_file_leaves_no_output(tmp_path):
+    write_comments(saved_comments(3), str(tmp_path / "good.csv"))
+    with open(tmp_path / "bad.csv", "w", encoding="utf-8") as bad_file:
+        bad_file.write("author,text,published_at,like_count\n@a,fine,2025-06-01T00:00:00Z,1\n@b,oops,2025-06-01,many\n")
+    report = reanalyze_comment_files([str(tmp_path / "good.csv"), str(tmp_path / "bad.csv")], workers=1,
+                                     batch_size=1, output_dir=str(tmp_path / "out"))
+    assert [summary["path"] for summary in report["files"]] == [str(tmp_path / "good.csv")]
+    assert os.listdir(tmp_path / "out") == ["good.csv"]
@@ -0,0 +1,45 @@
+import threading
+import time
+
+import pytest
+
+from youtube_analyzer import iter_comment_batches
+from youtube_scheduler import RequestCancelled, RequestScheduler, cancel_requests_on
+
+from conftest import VIDEO_URL
+from stub_youtube import StubYouTube
+
+def slow_retry_scheduler():
+    """Retries connection errors after a minute each."""
+    scheduler = RequestScheduler(rate=1e6, max_retries=5)
+    scheduler.backoff_delay = lambda attempt: 60
+    return scheduler
+
+def test_closing_the_stream_ends_a_retry_backoff():
+    youtube = StubYouTube(10)
+    youtube.failure = ConnectionError
+    youtube.failing_pages = {1}
+    scheduler = slow_retry_scheduler()
+    batches = iter_comment_batches(VIDEO_URL, "key", 100, youtube=youtube, score_cache=None, scheduler=scheduler)
+    assert len(next(batches)) == 3
+    while not scheduler.retries: # The prefetch thread is now waiting to retry page 1
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    batches.close()
+    assert time.monotonic() - started < 5
+    assert youtube.requests == 2 # The retry was not sent
+
+def test_cancelled_retry_raises():
+    youtube = StubYouTube(10)
+    youtube.failure = ConnectionError
+    youtube.failing_pages = {0}
+    stop_event = threading.Event()
+    stop_event.set()
+    cancel_requests_on(stop_event)
+    try:
+        with pytest.raises(RequestCancelled):
+            slow_retry_scheduler().execute(youtube.commentThreads().list(maxResults=3))
+    finally:
+        cancel_requests_on(None)
+    assert youtube.requests == 1
@@ -1,12 +1,60 @@
 import os
-import googleapiclient.discovery
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+# Only the light error module is imported up front. googleapiclient.discovery, NLTK,
+# matplotlib and numpy (comment_table, sentiment_index, near_duplicates) take most of the
+# startup time, so they are imported where first needed.
+import googleapiclient.errors
 import re 
-import csv 
-from nltk.corpus import stopwords 
-from nltk.tokenize import word_tokenize 
-from collections import Counter 
-import matplotlib.pyplot as plt
+import concurrent.futures
+import contextvars
+import functools
+import io
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import Counter, deque
+from comment_cache import CommentCache, ScoreCache
+from youtube_scheduler import (FetchCheckpoint, QuotaExceededError, RequestScheduler, cancel_requests_on,
+                               wrap_requests)
+from pipeline_profiler import PipelineProfiler, profile_count, profile_stage, profiled, record_page
+from comment_export import EXPORT_FORMATS, format_for_path, open_comment_writer, read_comment_batches
+
+# NLTK data packages the analyzer uses, with the path nltk.data.find looks them up by
+NLTK_RESOURCES = {
+    "vader_lexicon": "sentiment/vader_lexicon.zip",
+    "stopwords": "corpora/stopwords",
+}
+_available_nltk_resources = set()
+
+def ensure_nltk_resource(name):
+    """Makes sure one NLTK data package is installed, downloading just that package if it is missing."""
+    if name in _available_nltk_resources:
+        return
+    import nltk
+    try:
+        nltk.data.find(NLTK_RESOURCES[name])
+    except LookupError:
+        print(f"Downloading NLTK resource '{name}'...")
+        nltk.download(name, quiet=True)
+    _available_nltk_resources.add(name)
+
+def ensure_nltk_resources(names=("vader_lexicon", "stopwords")):
+    """Checks for (and downloads if needed) several NLTK packages up front, e.g. when building a container."""
+    for name in names:
+        ensure_nltk_resource(name)
+
+def _build_client(api_key):
+    """
+    Builds a YouTube Data API client. The YOUTUBE_API_ENDPOINT environment
+    variable points it at another server, e.g. benchmarks/fake_youtube_api.py.
+    """
+    import googleapiclient.discovery
+    api_endpoint = os.getenv("YOUTUBE_API_ENDPOINT")
+    return googleapiclient.discovery.build(
+        "youtube", "v3", developerKey=api_key,
+        client_options={"api_endpoint": api_endpoint} if api_endpoint else None
+    )
 
 def get_video_id(url):
     """Extracts the video ID from a YouTube URL."""
@@ -14,122 +62,1031 @@ def get_video_id(url):
     match = re.search(r'(?:v=|\/)([a-zA-Z0-9_-]{11})(?:&|\?)?', url)
     return match.group(1) if match else None
 
-def get_youtube_comments(video_url, api_key, max_comments=10000):
+def _fetch_comment_pages(youtube, video_id, max_comments, page_token=None, order=None):
+    """
+    Yields the raw commentThreads responses for a video, one page at a time,
+    until max_comments items have been requested or there are no more pages.
+    `order` is passed to the API ("time" or "relevance"; the API defaults to "time").
+    """
+    requested_count = 0
+    # Continues until max_comments is reached or no more pages are available
+    while requested_count < max_comments:
+        # Construct the API request to list comment threads
+        request = youtube.commentThreads().list(
+            part="snippet",
+            videoId=video_id,
+            textFormat="plainText",
+            maxResults=min(10000, max_comments - requested_count),
+            pageToken=page_token,
+            order=order
+        )
+        request_started = time.perf_counter()
+        response = request.execute() # Execute the API request
+        record_page(time.perf_counter() - request_started, len(response.get("items", [])))
+        yield response
+
+        requested_count += len(response.get("items", []))
+        # Get the token for the next page
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            print("No more comments or reached end of available comments.")
+            break
+
+_PAGES_DONE = object() # Sentinel the prefetch thread puts on the queue after the last page
+
+def _prefetch_pages(pages, prefetch=2):
+    """
+    Runs the `pages` generator on a background thread so the next API pages are
+    downloaded while the caller is still processing the current one.
+    At most `prefetch` pages are buffered. Errors raised while fetching are
+    re-raised in the caller's thread, after the pages fetched before them.
+    With prefetch=0 pages are fetched on demand in the caller's thread instead.
+    """
+    if prefetch <= 0:
+        yield from pages
+        return
+
+    page_queue = queue.Queue(maxsize=prefetch)
+    stop_event = threading.Event()
+
+    def put(entry):
+        # Blocks while the buffer is full, but gives up once the consumer has gone away
+        while not stop_event.is_set():
+            try:
+                page_queue.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        # A retry backoff of the scheduler ends as soon as the consumer stops
+        cancel_requests_on(stop_event)
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    return
+        except Exception as e:
+            put((None, e))
+            return
+        finally:
+            pages.close() # Make sure the page generator is finalized on this thread
+        put((_PAGES_DONE, None))
+
+    # The thread runs in a copy of the caller's context, so the active profiler sees its requests
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(producer,), name="youtube-page-prefetch",
+                              daemon=True)
+    thread.start()
+    try:
+        while True:
+            page, error = page_queue.get()
+            if error is not None:
+                raise error
+            if page is _PAGES_DONE:
+                return
+            yield page
+    finally:
+        # Also runs when the caller stops iterating early, so the producer does not keep fetching.
+        # Waiting for it (at most one request, as a retry backoff wait ends on stop_event) leaves
+        # the API client free for the caller again.
+        stop_event.set()
+        thread.join()
+
+def _parse_comment(item):
+    """
+    Extracts the comment details from a commentThreads item into a comment
+    dictionary (without sentiment scores yet). Raises KeyError if malformed.
+    """
+    return _parse_comment_snippet(item["snippet"]["topLevelComment"]["snippet"])
+
+def _parse_comment_snippet(comment_snippet):
+    """Builds a comment dictionary from a comment snippet (top-level comment or reply)."""
+    return {
+        "author": comment_snippet["authorDisplayName"],
+        "text": comment_snippet["textDisplay"],
+        "published_at": comment_snippet["publishedAt"],
+        "like_count": comment_snippet["likeCount"]
+    }
+
+def _add_sentiment(comment, polarity_scores):
+    """Stores VADER polarity scores on a comment dictionary and returns it."""
+    comment["sentiment_compound"] = polarity_scores['compound']
+    comment["sentiment_pos"] = polarity_scores['pos']
+    comment["sentiment_neu"] = polarity_scores['neu']
+    comment["sentiment_neg"] = polarity_scores['neg']
+    return comment
+
+_analyzer = None # VADER analyzer of the current process, created on first use
+
+def _init_score_worker():
+    """Process-pool initializer: loads the VADER lexicon once per worker process."""
+    global _analyzer
+    if _analyzer is None:
+        ensure_nltk_resource("vader_lexicon")
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+        _analyzer = SentimentIntensityAnalyzer()
+
+def _score_chunk(texts):
+    """Scores a chunk of texts with this process's VADER analyzer."""
+    _init_score_worker()
+    return [_analyzer.polarity_scores(text) for text in texts]
+
+def make_score_pool(workers):
+    """Creates a process pool whose workers are ready to score comments with VADER."""
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_score_worker)
+
+# Score cache used by the fetch functions unless they are given another one
+default_score_cache = ScoreCache()
+
+def score_comments(texts, workers=1, chunk_size=2000, executor=None, cache=None):
+    """
+    Scores many comment texts with VADER and returns their polarity score
+    dictionaries in input order.
+    With workers > 1 (or an `executor` from make_score_pool) the texts are split
+    into chunks of chunk_size that are scored in parallel worker processes.
+    The scores are identical to calling polarity_scores on each text serially.
+    If a ScoreCache is given, only texts it has not seen before are scored.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    if cache is not None:
+        results, missing = cache.get_many(texts)
+        profile_count("score_cache_hits", sum(1 for scores in results if scores is not None))
+        if missing:
+            missing_scores = score_comments(missing, workers, chunk_size, executor)
+            cache.put_many(missing, missing_scores)
+            scored = dict(zip(missing, missing_scores))
+            results = [scores if scores is not None else scored[text] for text, scores in zip(texts, results)]
+        return results
+    with profile_stage("score", items=len(texts)):
+        if executor is None and (workers is None or workers <= 1 or len(texts) <= chunk_size):
+            return _score_chunk(texts)
+
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        if executor is not None:
+            chunk_results = executor.map(_score_chunk, chunks)
+            return [scores for chunk in chunk_results for scores in chunk]
+        with make_score_pool(workers) as pool:
+            return [scores for chunk in pool.map(_score_chunk, chunks) for scores in chunk]
+
+# Rate limiter / retry policy shared by every fetch unless another scheduler is given
+default_scheduler = RequestScheduler()
+
+def iter_comment_batches(video_url, api_key, max_comments=10000, prefetch=2, youtube=None, score_workers=1, order=None,
+                         score_cache=default_score_cache, page_token=None, scheduler=default_scheduler, checkpoint=None,
+                         stop_before=None, on_thread=None):
+    """
+    Streams the comments of a YouTube video as one list of comment dictionaries
+    (with sentiment scores) per API page.
+    Pages are fetched on a background thread, up to `prefetch` pages ahead, so
+    network waits overlap with the VADER scoring of the previous page.
+    With score_workers > 1 each page is scored across a process pool.
+    Texts already in `score_cache` (a ScoreCache, or None to disable) are not rescored.
+    Requests go through `scheduler` (rate limiting, quota accounting, retries).
+    Fetching starts at `page_token` if given; a FetchCheckpoint passed as
+    `checkpoint` is kept pointing at the next page to fetch, and is marked
+    complete once the stream ends normally.
+    With stop_before (a publishedAt timestamp, for order="time"), the stream
+    ends at the first comment published before it; that comment and the rest
+    of its page are neither scored nor yielded.
+    on_thread, if given, is called as on_thread(item, comment) with the raw
+    commentThreads item of every comment as soon as it is parsed (before the
+    page is scored), e.g. to start fetching its replies.
+    An already-built API client can be passed as `youtube` (e.g. a stub in tests).
+    Raises ValueError for an invalid URL; API errors are raised to the caller
+    after every page fetched before them has been yielded.
+    """
+    video_id = get_video_id(video_url)
+    if not video_id:
+        raise ValueError("Could not extract a valid video ID from the provided URL.")
+
+    if youtube is None:
+        # Build the YouTube API client
+        youtube = _build_client(api_key)
+    if scheduler is not None:
+        youtube = scheduler.wrap(youtube)
+    # Score pages in worker processes if requested; the pool lives as long as the stream
+    score_pool = make_score_pool(score_workers) if score_workers and score_workers > 1 else None
+
+    comments_fetched_count = 0
+    reached_stop = False
+    print(f"Fetching comments for video ID: {video_id}...")
+
+    pages = _prefetch_pages(_fetch_comment_pages(youtube, video_id, max_comments, page_token, order), prefetch)
+    try:
+        for response in pages:
+            # Process the comments from the current API response
+            batch = []
+            with profile_stage("parse") as parse_stage:
+                for item in response.get("items", []):
+                    try:
+                        comment = _parse_comment(item)
+                    except KeyError as e:
+                        # This catches cases where a comment item might be malformed or missing expected keys
+                        print(f"Warning: Skipping malformed comment item. Missing key: {e}. Item: {item}")
+                        continue
+
+                    if stop_before is not None and comment["published_at"] < stop_before:
+                        reached_stop = True
+                        break # Newest first: every later comment is older still
+                    if on_thread is not None:
+                        on_thread(item, comment)
+                    batch.append(comment)
+                    comments_fetched_count += 1
+                    if comments_fetched_count >= max_comments:
+                        break # Stop if we've reached our desired max_comments
+                parse_stage.items = len(batch)
+            profile_count("comments_fetched", len(batch))
+
+            # Perform sentiment analysis using VADER on the comment texts of this page
+            texts = [comment["text"] for comment in batch]
+            if score_pool is not None:
+                page_scores = score_comments(texts, chunk_size=max(1, -(-len(texts) // score_workers)),
+                                             executor=score_pool, cache=score_cache)
+            else:
+                page_scores = score_comments(texts, cache=score_cache)
+            for comment, scores in zip(batch, page_scores):
+                _add_sentiment(comment, scores)
+            if checkpoint is not None:
+                checkpoint.page_token = response.get("nextPageToken")
+            yield batch
+
+            if comments_fetched_count >= max_comments or reached_stop:
+                break
+        if checkpoint is not None:
+            checkpoint.complete = True
+    finally:
+        pages.close()
+        if score_pool is not None:
+            score_pool.shutdown(cancel_futures=True)
+
+def get_youtube_comments(video_url, api_key, max_comments=10000, youtube=None, score_cache=default_score_cache,
+                         scheduler=default_scheduler, checkpoint=None, on_batch=None):
     """
     Fetches comments for a given YouTube video URL, performs sentiment analysis
     on each comment, and returns a list of dictionaries with comment details
     and sentiment scores.
     Handles pagination to fetch up to max_comments.
+    This is a thin wrapper that collects the batches of iter_comment_batches.
+    If the fetch is interrupted (API error, quota exhausted), the comments
+    fetched so far are returned. Pass a FetchCheckpoint to be able to resume:
+    calling again with the same, incomplete checkpoint continues from the last
+    pageToken instead of refetching.
+    on_batch, if given, is called with every batch of comments as soon as it
+    has been scored (and first with the comments of a resumed checkpoint).
+    Errors raised by on_batch are not fetch errors: they propagate to the caller.
     """
     video_id = get_video_id(video_url)
     if not video_id:
         print("Error: Could not extract a valid video ID from the provided URL.")
         return [] # Return an empty list if URL is invalid
 
-    # Build the YouTube API client
-    youtube = googleapiclient.discovery.build(
-        "youtube", "v3", developerKey=api_key
-    )
-    # Initialize VADER sentiment analyzer
-    analyzer = SentimentIntensityAnalyzer()
+    if checkpoint is None:
+        checkpoint = FetchCheckpoint()
+    if checkpoint.video_id != video_id or checkpoint.complete:
+        checkpoint.reset(video_id)
+    elif checkpoint.comments:
+        print(f"Resuming the interrupted fetch for video ID {video_id} ({len(checkpoint.comments)} comments already fetched)...")
 
-    comments = [] 
-    next_page_token = None 
-    comments_fetched_count = 0 
+    comments = checkpoint.comments
+    profile_count("comments", len(comments))
+    if comments and on_batch is not None:
+        on_batch(comments)
+    batches = iter_comment_batches(video_url, api_key, max_comments - len(comments), youtube=youtube,
+                                   score_cache=score_cache, page_token=checkpoint.page_token,
+                                   scheduler=scheduler, checkpoint=checkpoint)
+    try:
+        while True:
+            # Only the fetch is guarded: an error raised by on_batch (e.g. an export that cannot
+            # be written) is not an interrupted fetch and propagates to the caller
+            try:
+                batch = next(batches)
 
-    print(f"Fetching comments for video ID: {video_id}...")
+            except StopIteration:
+                break
 
-    # 
-    # Continues until max_comments is reached or no more pages are available
-    while comments_fetched_count < max_comments:
-        try:
-            # Construct the API request to list comment threads
-            request = youtube.commentThreads().list(
-                part="snippet", 
-                videoId=video_id,
-                textFormat="plainText", 
-                maxResults=min(10000, max_comments - comments_fetched_count),
-                pageToken=next_page_token 
-            )
-            response = request.execute() # Execute the API request
-
-        except googleapiclient.errors.HttpError as e:
-            # Catch specific HTTP errors from the API (e.g., 400 Bad Request, 403 Forbidden)
-            print(f"API Error fetching comments: {e}")
-            print("Possible reasons: Invalid video ID, comments disabled, or exceeded API quota.")
-            return []
+            except QuotaExceededError as e:
+                print(f"API quota exhausted: {e}")
+                print(f"Keeping the {len(comments)} comments fetched so far; the fetch can be resumed later.")
+                return comments
 
+            except googleapiclient.errors.HttpError as e:
+                # Catch specific HTTP errors from the API (e.g., 400 Bad Request, 403 Forbidden)
+                print(f"API Error fetching comments: {e}")
+                print("Possible reasons: Invalid video ID, comments disabled, or exceeded API quota.")
+                print(f"Keeping the {len(comments)} comments fetched so far; the fetch can be resumed later.")
+                return comments
+
+            except Exception as e:
+                print(f"An unexpected error occurred during comment fetching: {e}")
+                print(f"Keeping the {len(comments)} comments fetched so far; the fetch can be resumed later.")
+                return comments
+
+            comments.extend(batch)
+            profile_count("comments", len(batch))
+            if on_batch is not None:
+                on_batch(batch)
+    finally:
+        batches.close()
+
+    print(f"Successfully fetched and analyzed {len(comments)} comments.")
+    # Only an interrupted fetch needs its comments in the checkpoint; don't keep a second reference to them
+    checkpoint.comments = []
+    return comments
+
+def _thread_local_clients(api_key):
+    """
+    Returns a function that gives each calling thread its own YouTube API client.
+    googleapiclient clients (and their httplib2 connections) are not thread-safe,
+    so worker threads share the API key and discovery document but not a client.
+    """
+    local = threading.local()
+
+    def get_client():
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = _build_client(api_key)
+        return client
+
+    return get_client
+
+def _fetch_replies(youtube, parent_id, max_replies=None):
+    """Fetches the replies of one comment thread via comments().list, following pagination."""
+    replies = []
+    page_token = None
+    while max_replies is None or len(replies) < max_replies:
+        request_started = time.perf_counter()
+        response = youtube.comments().list(
+            part="snippet",
+            parentId=parent_id,
+            textFormat="plainText",
+            maxResults=100,
+            pageToken=page_token
+        ).execute()
+        record_page(time.perf_counter() - request_started, len(response.get("items", [])))
+        for item in response.get("items", []):
+            try:
+                replies.append(_parse_comment_snippet(item["snippet"]))
+            except KeyError as e:
+                print(f"Warning: Skipping malformed reply. Missing key: {e}. Item: {item}")
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
+    return replies[:max_replies]
+
+def fetch_comments_for_videos(video_urls, api_key, max_comments=10000, include_replies=False, max_replies=None,
+                              concurrency=4, progress=None, client_factory=None, score_cache=default_score_cache,
+                              scheduler=default_scheduler, checkpoints=None):
+    """
+    Fetches and scores the comments of many videos concurrently on a thread pool.
+    Returns a dictionary mapping each video ID to its list of comment dictionaries;
+    a video whose fetch fails maps to the comments fetched before the error.
+
+    Every video is streamed with iter_comment_batches (prefetching pages while
+    the previous one is scored). max_comments limits the top-level comments per
+    video. With include_replies, the replies of every thread (up to max_replies
+    each) are fetched in parallel via comments().list and placed right after
+    their top-level comment.
+    At most `concurrency` API requests are in flight at once. Each worker thread
+    uses its own client from client_factory() (by default one built from api_key).
+    Requests go through `scheduler`, so retries and quota are shared by all videos.
+    progress, if given, is called as progress(video_id, comments_so_far, done)
+    after every page of a video and once when the video is finished.
+    checkpoints, if given, is a dictionary of video ID -> FetchCheckpoint that is
+    kept up to date (missing entries are added), so a failed video can be resumed
+    by calling again with the same dictionary. Resuming continues after the last
+    page fetched, and fetches the replies of threads whose replies failed again.
+    """
+    get_client = client_factory or _thread_local_clients(api_key)
+    request_slots = threading.BoundedSemaphore(concurrency)
+    progress_lock = threading.Lock()
+
+    def report(video_id, count, done):
+        if progress is not None:
+            with progress_lock:
+                progress(video_id, count, done)
+
+    def execute_in_slot(request):
+        with request_slots:
+            return request.execute()
+
+    def client():
+        return wrap_requests(get_client(), execute_in_slot)
+
+    def fetch_thread_replies(parent_id):
+        youtube = client()
+        replies = _fetch_replies(scheduler.wrap(youtube) if scheduler is not None else youtube, parent_id, max_replies)
+        texts = [reply["text"] for reply in replies]
+        for reply, scores in zip(replies, score_comments(texts, cache=score_cache)):
+            _add_sentiment(reply, scores)
+        return replies
+
+    def fetch_video(video_id, reply_pool):
+        if checkpoints is None:
+            checkpoint = FetchCheckpoint()
+        else:
+            checkpoint = checkpoints.setdefault(video_id, FetchCheckpoint())
+        if checkpoint.video_id != video_id or (checkpoint.complete and not checkpoint.failed_replies):
+            checkpoint.reset(video_id)
+        resumed = len(checkpoint.comments)
+        threads = [] # Top-level comments, in order
+        reply_futures = {} # id() of a top-level comment -> (its ID, future of its replies)
+
+        def start_replies(item, comment):
+            if item["snippet"].get("totalReplyCount", 0) > 0:
+                reply_futures[id(comment)] = (item["id"], reply_pool.submit(contextvars.copy_context().run,
+                                                                            fetch_thread_replies, item["id"]))
+
+        # Replies that failed in an earlier call are fetched again, by the index of their top-level comment
+        retried_replies = {index: (parent_id, reply_pool.submit(contextvars.copy_context().run, fetch_thread_replies,
+                                                                parent_id))
+                           for parent_id, index in checkpoint.failed_replies}
+        try:
+            if not checkpoint.complete: # Otherwise only failed replies were left to fetch
+                for batch in iter_comment_batches(f"https://www.youtube.com/watch?v={video_id}", api_key,
+                                                  max_comments - checkpoint.thread_count, youtube=client(),
+                                                  score_cache=score_cache, page_token=checkpoint.page_token,
+                                                  scheduler=scheduler, checkpoint=checkpoint,
+                                                  on_thread=start_replies if include_replies else None):
+                    threads.extend(batch)
+                    report(video_id, resumed + len(threads), False)
         except Exception as e:
-        
-            print(f"An unexpected error occurred during comment fetching: {e}")
-            return [] 
+            print(f"Error fetching comments for video ID {video_id}: {e}")
+
+        comments = []
+        failed_replies = []
 
-        # Process the comments from the current API response
-        for item in response.get("items", []): 
+        def add_thread(comment, parent_id=None, replies=None):
+            comments.append(comment)
+            if replies is None:
+                return
             try:
-                
-                comment_snippet = item["snippet"]["topLevelComment"]["snippet"]
-                comment_text = comment_snippet["textDisplay"]
-
-                # Perform sentiment analysis using VADER on the comment text
-                polarity_scores = analyzer.polarity_scores(comment_text)
-
-                comments.append({
-                    "author": comment_snippet["authorDisplayName"],
-                    "text": comment_text,
-                    "published_at": comment_snippet["publishedAt"],
-                    "like_count": comment_snippet["likeCount"],
-                    "sentiment_compound": polarity_scores['compound'],
-                    "sentiment_pos": polarity_scores['pos'],     
-                    "sentiment_neu": polarity_scores['neu'],       
-                    "sentiment_neg": polarity_scores['neg']           
-                })
-                comments_fetched_count += 1
-                if comments_fetched_count >= max_comments:
-                    break # Stop if we've reached our desired max_comments
+                comments.extend(replies.result())
+            except Exception as e:
+                print(f"Error fetching replies for a comment on video ID {video_id}: {e}")
+                failed_replies.append([parent_id, len(comments) - 1])
 
-            except KeyError as e:
-                # This catches cases where a comment item might be malformed or missing expected keys
-                print(f"Warning: Skipping malformed comment item. Missing key: {e}. Item: {item}")
-                continue 
+        for index, comment in enumerate(checkpoint.comments):
+            add_thread(comment, *retried_replies.get(index, ()))
+        for comment in threads:
+            add_thread(comment, *reply_futures.get(id(comment), ()))
+        checkpoint.thread_count += len(threads)
+        checkpoint.failed_replies = failed_replies
+        # Only an interrupted fetch, or one with replies still missing, needs to keep its comments
+        checkpoint.comments = [] if checkpoint.complete and not failed_replies else comments
+        profile_count("comments", len(comments) - resumed)
+        report(video_id, len(comments), True)
+        return comments
 
-        # Get the token for the next page
-        next_page_token = response.get("nextPageToken")
-        if not next_page_token:
-           
-            print("No more comments or reached end of available comments.")
-            break 
+    video_ids = []
+    for video_url in video_urls:
+        video_id = get_video_id(video_url)
+        if video_id:
+            video_ids.append(video_id)
+        else:
+            print(f"Error: Could not extract a valid video ID from {video_url!r}, skipping it.")
 
-    print(f"Successfully fetched and analyzed {len(comments)} comments.")
-    return comments 
-def extract_keywords(comments, num_keywords=10):
-    all_words = []
-    stop_words = set(stopwords.words('english'))
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="youtube-replies") as reply_pool, \
+         concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="youtube-videos") as video_pool:
+        # Each task runs in a copy of the caller's context, so the active profiler sees the worker threads
+        futures = {video_id: video_pool.submit(contextvars.copy_context().run, fetch_video, video_id, reply_pool)
+                   for video_id in dict.fromkeys(video_ids)}
+        for video_id, future in futures.items():
+            results[video_id] = future.result()
+    return results
+
+def get_youtube_comments_cached(video_url, api_key, cache, max_comments=10000, youtube=None, checkpoint=None,
+                                on_batch=None):
+    """
+    Like get_youtube_comments, but serves the comments from a CommentCache.
+    A video cached deeply enough (CommentCache.covers) is refreshed
+    incrementally: comments are fetched newest first and paging stops at the
+    first comment older than the newest cached one, so only new comments cost
+    API quota and get scored. A video not cached, or cached from a fetch of
+    fewer than max_comments comments, is fetched in full.
+    A refresh is only stored once it reaches the cached comments; if it fails
+    before that, nothing is stored (so no gap opens below the new comments)
+    and the cached comments are returned. A full fetch that gets interrupted is
+    not cached either; pass a FetchCheckpoint to resume it later.
+    on_batch, if given, receives every returned comment exactly once: page by page
+    during a full fetch, or in one batch when the comments come from the cache.
+    """
+    video_id = get_video_id(video_url)
+    if not video_id:
+        print("Error: Could not extract a valid video ID from the provided URL.")
+        return []
+
+    newest_cached = cache.newest_published_at(video_id)
+    if newest_cached is None or not cache.covers(video_id, max_comments):
+        if newest_cached is not None:
+            print(f"The cache holds fewer than {max_comments} comments of video ID {video_id}; fetching them all again...")
+        if checkpoint is None:
+            checkpoint = FetchCheckpoint()
+        comments = get_youtube_comments(video_url, api_key, max_comments, youtube=youtube, checkpoint=checkpoint,
+                                        on_batch=on_batch)
+        if comments and checkpoint.complete:
+            cache.add(video_id, comments)
+            # The video has no more comments only if the pager reached its last page (a page
+            # token is left whenever it stopped at max_comments); counting the comments would
+            # mistake malformed items that were skipped for the end of the video
+            cache.set_fetch_depth(video_id, len(comments), fetched_all=checkpoint.page_token is None)
+        return comments
+
+    print(f"Refreshing cached comments for video ID: {video_id} (newest cached: {newest_cached})...")
+    new_comments = []
+    try:
+        # No prefetching: pages fetched ahead would be thrown away once we reach cached comments.
+        # Comments published at the same second as the newest cached one may or may not be
+        # cached already; they are fetched and the cache skips the ones it has.
+        for batch in iter_comment_batches(video_url, api_key, max_comments, prefetch=0, youtube=youtube, order="time",
+                                          stop_before=newest_cached):
+            new_comments.extend(batch)
+
+    except googleapiclient.errors.HttpError as e:
+        print(f"API Error refreshing comments: {e}")
+        print("Showing the cached comments only.")
+        new_comments = None
+
+    except Exception as e:
+        print(f"An unexpected error occurred while refreshing comments: {e}")
+        print("Showing the cached comments only.")
+        new_comments = None
+
+    if new_comments is not None:
+        depth, fetched_all = cache.fetch_depth(video_id)
+        if len(new_comments) >= max_comments:
+            # The refresh may have stopped short of the cached comments, leaving a gap
+            # below the new ones: keep only the new comments, which cover max_comments
+            cache.invalidate(video_id)
+            depth, fetched_all = 0, False
+        added = cache.add(video_id, new_comments)
+        cache.set_fetch_depth(video_id, depth + added, fetched_all)
+        print(f"Added {added} new comments to the cache.")
+    comments = cache.get(video_id, limit=max_comments)
+    profile_count("comments", len(comments))
+    if on_batch is not None:
+        on_batch(comments)
+    return comments
+
+# Everything except ASCII letters and whitespace is dropped before splitting into words
+_KEYWORD_STRIP_RE = re.compile(r'[^a-z\s]')
+# Words NLTK's Treebank tokenizer (used by word_tokenize) splits in two; kept so the
+# keyword counts stay identical to the word_tokenize-based extraction
+_TREEBANK_SPLITS = {
+    "cannot": ("can", "not"), "gimme": ("gim", "me"), "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"), "lemme": ("lem", "me"), "wanna": ("wan", "na"),
+}
+
+@functools.lru_cache(maxsize=None)
+def _english_stopwords():
+    """Loads NLTK's English stopword list once per process."""
+    ensure_nltk_resource("stopwords")
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words('english'))
+
+def keyword_tokens(text, stop_words=None):
+    """Returns the lowercase keyword candidates of one comment text, stopwords removed."""
+    if stop_words is None:
+        stop_words = _english_stopwords()
+    tokens = []
+    for word in _KEYWORD_STRIP_RE.sub('', text.lower()).split():
+        for token in _TREEBANK_SPLITS.get(word, (word,)):
+            if len(token) > 1 and token not in stop_words:
+                tokens.append(token)
+    return tokens
+
+def _iter_keywords(texts, ngram, stop_words):
+    for text in texts:
+        tokens = keyword_tokens(text, stop_words)
+        if ngram == 1:
+            yield from tokens
+        else:
+            # n-grams are built from consecutive keywords of the same comment
+            for i in range(len(tokens) - ngram + 1):
+                yield " ".join(tokens[i:i + ngram])
+
+def _count_keyword_chunk(texts, ngram=1):
+    """Counts the keywords of a chunk of texts (also used as a process-pool task)."""
+    counts = Counter()
+    counts.update(_iter_keywords(texts, ngram, _english_stopwords()))
+    return counts
+
+def _comment_texts(comments):
+    """Returns the texts of a CommentTable or of any iterable of comment dictionaries."""
+    texts = getattr(comments, "texts", None)
+    if texts is not None:
+        return texts
+    return (comment['text'] for comment in comments)
+
+def count_keywords(comments, ngram=1, workers=1, chunk_size=5000, counter=None):
+    """
+    Counts keywords (or n-grams of consecutive keywords with ngram > 1) over
+    comments in a single pass, without materializing the word list.
+    With workers > 1 chunks of chunk_size comments are counted in parallel
+    processes and the counters are merged in input order, so ties keep the
+    same first-seen order as a serial count.
+    Counts are added to `counter` if one is given (for running totals).
+    """
+    counts = Counter() if counter is None else counter
+    texts = _comment_texts(comments)
+    with profile_stage("keywords", items=len(comments) if hasattr(comments, "__len__") else 0):
+        if workers is None or workers <= 1:
+            counts.update(_iter_keywords(texts, ngram, _english_stopwords()))
+            return counts
+
+        texts = list(texts)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_counts in pool.map(_count_keyword_chunk, chunks, [ngram] * len(chunks)):
+                counts.update(chunk_counts)
+        return counts
+
+def extract_keywords(comments, num_keywords=10, ngram=1, workers=1):
+    """
+    Returns the num_keywords most common keywords of the comments as
+    (keyword, count) pairs. With ngram > 1, the most common n-word phrases.
+    """
+    return count_keywords(comments, ngram=ngram, workers=workers).most_common(num_keywords)
+
+class RunningKeywords:
+    """
+    Top keywords of a growing comment set, updated one batch at a time.
+    Counts only ever grow, so the new top list can only contain the previous
+    top keywords or keywords from the new batch; an update therefore costs time
+    proportional to the batch, not to all comments seen so far. top() returns
+    the same list (ties included) as extract_keywords over every comment added.
+    """
+
+    def __init__(self, num_keywords=10, ngram=1):
+        self.num_keywords = num_keywords
+        self.ngram = ngram
+        self.counts = Counter()
+        self._first_seen = {} # Keyword -> order of first appearance, used to break ties like Counter.most_common
+        self._top = []
+
+    def update(self, comments):
+        """Adds a batch of comments (dictionaries or a CommentTable) and refreshes the top list."""
+        batch_counts = count_keywords(comments, ngram=self.ngram)
+        for keyword in batch_counts:
+            if keyword not in self._first_seen:
+                self._first_seen[keyword] = len(self._first_seen)
+        self.counts.update(batch_counts)
+        candidates = set(self._top).union(batch_counts)
+        self._top = sorted(candidates, key=lambda k: (-self.counts[k], self._first_seen[k]))[:self.num_keywords]
+
+    def top(self):
+        """Returns the current top keywords as (keyword, count) pairs."""
+        return [(keyword, self.counts[keyword]) for keyword in self._top]
+
+
+# --- Offline re-analysis of saved comment files ---
+
+def iter_comment_files(paths):
+    """
+    Expands files and directories into the saved comment files to re-analyze.
+    Directories are searched recursively for .csv, .jsonl and .parquet files.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                try:
+                    format_for_path(name)
+                except ValueError:
+                    continue
+                yield os.path.join(root, name)
+
+def _saved_comment(row):
+    """Turns a row of a saved file into a comment dictionary, tolerating missing columns."""
+    return {
+        "author": row.get("author") or "",
+        "text": row.get("text") or "",
+        "published_at": row.get("published_at") or "",
+        "like_count": row.get("like_count") or 0,
+    }
+
+def _reanalyze_chunk(texts, ngram=1):
+    """Process-pool task: scores a chunk of texts and counts its keywords in the same worker."""
+    return _score_chunk(texts), _count_keyword_chunk(texts, ngram)
 
-    for comment in comments:
-        text = comment['text'].lower()
-        words = word_tokenize(re.sub(r'[^a-zA-Z\s]', '', text))
-        filtered_words = [word for word in words if word not in stop_words and len(word) > 1]
-        all_words.extend(filtered_words)
+def _map_bounded(executor, function, chunks, window, *args):
+    """
+    Like executor.map over (chunk, result) pairs, in input order, but keeps at most
+    `window` chunks in flight, so a huge input is never queued up in memory at once.
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append((chunk, executor.submit(function, [comment["text"] for comment in chunk], *args)))
+        if len(pending) >= window:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+    while pending:
+        chunk, future = pending.popleft()
+        yield chunk, future.result()
 
-    word_counts = Counter(all_words)
-    return word_counts.most_common(num_keywords)
+def _summary(tally, keyword_counts, num_keywords):
+    positive_count, neutral_count, negative_count = tally.sentiment_counts()
+    return {
+        "comments": tally.count,
+        "average_compound": tally.mean_compound(),
+        "like_weighted": tally.like_weighted_sentiment(),
+        "positive": positive_count,
+        "neutral": neutral_count,
+        "negative": negative_count,
+        "top_keywords": keyword_counts.most_common(num_keywords),
+    }
+
+def reanalyze_comment_files(paths, workers=None, batch_size=10000, chunk_size=2000, num_keywords=10, ngram=1,
+                            output_dir=None, progress=None):
+    """
+    Re-scores saved comment files (CSV, JSON Lines or Parquet, as written by
+    the analyzer) with VADER and recounts their keywords, without the API.
+    Files are streamed batch by batch and chunks of chunk_size comments are
+    scored and counted in `workers` processes (default: one per CPU), with a
+    bounded number of chunks in flight, so memory use does not depend on the
+    file sizes. With output_dir, each file is written there again (same name
+    and format) with the new scores. A name that is taken (by another file of
+    the same name, or by one of the input files, which are never overwritten)
+    gets a numbered suffix. Files are written under a temporary name and only
+    renamed once complete, so a file that fails leaves no output behind.
+    progress, if given, is called as progress(path, file_summary) after each file.
+    Returns a report: {"files": [summary per file], "total": summary of all files},
+    where a summary holds the comment count, sentiment figures, top keywords and
+    how many stored compound scores the rescoring changed.
+    """
+    from comment_table import SentimentTally
+
+    workers = workers or os.cpu_count() or 1
+    total_tally = SentimentTally()
+    total_keywords = Counter()
+    total_changed = 0
+    output_names = set()
+    report = {"files": []}
+
+    def chunks_of(path):
+        for batch in read_comment_batches(path, batch_size=batch_size):
+            for start in range(0, len(batch), chunk_size):
+                yield batch[start:start + chunk_size]
+
+    files = list(iter_comment_files(paths))
+    input_paths = {os.path.realpath(path) for path in files}
+    executor = make_score_pool(workers) if workers > 1 else None
+    try:
+        for path in files:
+            tally = SentimentTally()
+            keyword_counts = Counter()
+            changed = 0
+            writer = None
+            output_path = temp_path = None
+            if output_dir is not None:
+                os.makedirs(output_dir, exist_ok=True)
+                # Files with the same name from different directories get a numbered suffix, and so do
+                # names of input files (e.g. when output_dir is the directory being re-analyzed)
+                name, extension = os.path.splitext(os.path.basename(path))
+                output_name = name + extension
+                suffixes = itertools.count(1)
+                while (output_name in output_names
+                       or os.path.realpath(os.path.join(output_dir, output_name)) in input_paths):
+                    output_name = f"{name}_{next(suffixes)}{extension}"
+                output_names.add(output_name)
+                output_path = os.path.join(output_dir, output_name)
+                temp_path = os.path.join(output_dir, f".{output_name}.{os.getpid()}.tmp")
+            completed = False
+            try:
+                if output_path is not None:
+                    writer = open_comment_writer(temp_path, format_for_path(output_path))
+                if executor is not None:
+                    results = _map_bounded(executor, _reanalyze_chunk, chunks_of(path), 2 * workers, ngram)
+                else:
+                    results = ((chunk, _reanalyze_chunk([comment["text"] for comment in chunk], ngram))
+                               for chunk in chunks_of(path))
+                # Reading, scoring and keyword counting overlap, so they are timed as one stage
+                with profile_stage("reanalyze") as reanalyze_stage:
+                    for rows, (scores, chunk_keywords) in results:
+                        comments = []
+                        for row, polarity_scores in zip(rows, scores):
+                            if row.get("sentiment_compound") != polarity_scores["compound"]:
+                                changed += 1
+                            comments.append(_add_sentiment(_saved_comment(row), polarity_scores))
+                        tally.add(comments)
+                        keyword_counts.update(chunk_keywords)
+                        if writer is not None:
+                            writer.write_batch(comments)
+                    reanalyze_stage.items = tally.count
+                profile_count("comments", tally.count)
+                if writer is not None:
+                    writer.close()
+                    if os.path.exists(temp_path): # Not created if the file had no comments
+                        os.replace(temp_path, output_path)
+                completed = True
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error re-analyzing {path}: {e}")
+                continue
+            finally:
+                if writer is not None and not completed:
+                    # Drop the partly written file
+                    writer.close()
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+
+            summary = _summary(tally, keyword_counts, num_keywords)
+            summary["path"] = path
+            summary["scores_changed"] = changed
+            report["files"].append(summary)
+            if progress is not None:
+                progress(path, summary)
+            total_tally.merge(tally)
+            total_keywords.update(keyword_counts)
+            total_changed += changed
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    report["total"] = _summary(total_tally, total_keywords, num_keywords)
+    report["total"]["files"] = len(report["files"])
+    report["total"]["scores_changed"] = total_changed
+    return report
+
+
+# --- Charts shared by the CLI and the Streamlit app ---
+SENTIMENT_LABELS = ['Positive', 'Neutral', 'Negative']
+SENTIMENT_COLORS = ['#4CAF50', '#FFC107', '#F44336'] # Green for Positive, Amber for Neutral, Red for Negative
+
+@profiled("charts")
+def plot_sentiment_pie(sentiment_counts):
+    """Draws the donut chart of (positive, neutral, negative) comment counts and returns the figure."""
+    import matplotlib.pyplot as plt
+    # Create the pie chart figure and axes
+    fig, ax = plt.subplots(figsize=(8, 8))
+    ax.pie(
+        sentiment_counts,
+        labels=SENTIMENT_LABELS,
+        autopct='%1.1f%%', # Format percentages on slices (e.g., "74.1%")
+        colors=SENTIMENT_COLORS,
+        startangle=90, # Start the first slice (Positive) at the top
+        pctdistance=0.85 # Distance of percentage labels from the center of the pie
+    )
+    # Add a white circle to the center to create a donut chart effect
+    centre_circle = plt.Circle((0,0),0.70,fc='white')
+    ax.add_artist(centre_circle)
+
+    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a perfect circle.
+    ax.set_title('Overall Comment Sentiment Distribution', fontsize=16) # Set chart title
+    return fig
+
+@profiled("charts")
+def plot_keywords_bar(top_keywords, height_per_keyword=0.6):
+    """Draws the horizontal bar chart of (keyword, count) pairs and returns the figure."""
+    import matplotlib.pyplot as plt
+    keywords = [item[0] for item in top_keywords]
+    counts = [item[1] for item in top_keywords]
+
+    # Adjust height based on number of keywords for better readability
+    fig, ax = plt.subplots(figsize=(10, max(6, len(keywords) * height_per_keyword)))
+    ax.barh(keywords, counts, color='skyblue') # Plot horizontal bars
+    ax.set_xlabel('Frequency', fontsize=12)
+    ax.set_ylabel('Keywords', fontsize=12)
+    ax.set_title('Top Keywords/Topics in Comments', fontsize=16)
+    ax.invert_yaxis() # Highest count at the top
+    fig.tight_layout()
+    return fig
+
+@profiled("charts")
+def plot_sentiment_trend(rollup):
+    """
+    Draws average and like-weighted sentiment over time, with the number of
+    comments per bucket as bars, from SentimentIndex.rollup() and returns the figure.
+    """
+    import matplotlib.pyplot as plt
+    times = [bucket_start for bucket_start, _ in rollup]
+    fig, ax = plt.subplots(figsize=(10, 5))
+    # Comment counts go on a second axis behind the sentiment lines
+    count_ax = ax.twinx()
+    width = (times[1] - times[0]) * 0.8 if len(times) > 1 else 0.03
+    count_ax.bar(times, [tally.count for _, tally in rollup], width=width, color='lightgray')
+    count_ax.set_ylabel('Comments', fontsize=12)
+    ax.set_zorder(count_ax.get_zorder() + 1)
+    ax.patch.set_visible(False)
+
+    ax.plot(times, [tally.mean_compound() for _, tally in rollup], marker='o', color='#FF4500', label='Average')
+    ax.plot(times, [tally.like_weighted_sentiment() for _, tally in rollup], linestyle='--', color='#1E90FF',
+            label='Like-weighted')
+    ax.axhline(0, color='gray', linewidth=0.8)
+    ax.set_ylim(-1, 1) # Compound scores range from -1 to 1
+    ax.set_ylabel('Compound Sentiment', fontsize=12)
+    ax.set_title('Sentiment Over Time', fontsize=16)
+    ax.legend(loc='upper left')
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    return fig
+
+@profiled("charts")
+def figure_to_png(fig, dpi=100):
+    """Renders a figure to PNG bytes and closes it."""
+    import matplotlib.pyplot as plt
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches='tight', dpi=dpi)
+    plt.close(fig)
+    return buffer.getvalue()
 
 
 # --- Main execution block when the script is run directly ---
+# Where the CLI keeps the progress of an interrupted fetch between runs
+CHECKPOINT_PATH = "youtube_fetch_checkpoint.json"
+
 if __name__ == "__main__":
+    import argparse
+    import matplotlib.pyplot as plt # Only needed for the chart files written below
+    from comment_table import CommentTable
+    from near_duplicates import NearDuplicateIndex
+    from sentiment_index import DAY, SentimentIndex, bucket_label
+
+    parser = argparse.ArgumentParser(description="Fetch, analyze and save the comments of a YouTube video.")
+    parser.add_argument("--url", help="YouTube video URL (asked for interactively if omitted)")
+    parser.add_argument("--output", default="youtube_comments_with_sentiment.csv",
+                        help="File the analyzed comments are saved to (default: %(default)s)")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS),
+                        help="Output format; guessed from the --output extension if omitted (parquet needs pyarrow)")
+    offline = parser.add_argument_group("offline re-analysis (no API key needed)")
+    offline.add_argument("--reanalyze", nargs="+", metavar="PATH",
+                         help="Re-score and recount keywords of saved comment files or directories instead of fetching")
+    offline.add_argument("--workers", type=int, help="Worker processes for --reanalyze (default: one per CPU)")
+    offline.add_argument("--report", default="reanalysis_report.json",
+                         help="JSON file the --reanalyze report is written to (default: %(default)s)")
+    offline.add_argument("--rescored-dir", help="Directory to write the re-scored files to (same names and formats)")
+    parser.add_argument("--profile", nargs="?", const="pipeline_profile.json", metavar="JSON_PATH",
+                        help="Print per-stage timings and memory use at the end and save them as JSON "
+                             "(default path: %(const)s); compare runs with pipeline_profiler.py")
+    args = parser.parse_args()
+    # Every stage of this run reports to the profiler (API pages, scoring, keywords, charts, export)
+    profiler = PipelineProfiler(label="cli").install() if args.profile else None
+
     # Get API key from environment variable for security
     api_key = os.getenv("YOUTUBE_API_KEY")
 
-    if not api_key:
+    if args.reanalyze:
+        def print_file_summary(path, summary):
+            print(f"{path}: {summary['comments']} comments, average compound {summary['average_compound']:.2f}, "
+                  f"{summary['scores_changed']} scores changed")
+
+        report = reanalyze_comment_files(args.reanalyze, workers=args.workers, output_dir=args.rescored_dir,
+                                         progress=print_file_summary)
+        total = report["total"]
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+
+        print("\n--- Re-analysis Summary ---")
+        print(f"Files: {total['files']}")
+        print(f"Total Comments Analyzed: {total['comments']}")
+        print(f"Average Compound Sentiment Score: {total['average_compound']:.2f}")
+        print(f"Like-Weighted Sentiment Score: {total['like_weighted']:.2f}")
+        print(f"Positive / Neutral / Negative Comments: {total['positive']} / {total['neutral']} / {total['negative']}")
+        print(f"Scores Changed by Rescoring: {total['scores_changed']}")
+        print("Top Keywords/Topics: " + (", ".join(f"{keyword} ({count})" for keyword, count in total["top_keywords"])
+                                          or "none"))
+        print(f"\nReport saved to {args.report}")
+    elif not api_key:
         print("Error: YOUTUBE_API_KEY environment variable not set.")
         print("Please set it according to the instructions and restart your terminal.")
     else:
-        video_url_input = input("Enter YouTube video URL: ")
+        video_url_input = args.url or input("Enter YouTube video URL: ")
 
         
         # Be mindful of YouTube Data API quota limits for larger numbers
-        fetched_comments = get_youtube_comments(video_url_input, api_key, max_comments=1500)
+        # Comments are kept in a local cache, so later runs only fetch the new ones.
+        # An interrupted first fetch (e.g. quota exhausted) is saved to a checkpoint file and resumed on the next run.
+        checkpoint = FetchCheckpoint.load(CHECKPOINT_PATH)
+        # Comments are saved while they are fetched, page by page, so the export never needs them all in memory at once
+        output_format = args.format or format_for_path(args.output)
+        # Comments are also binned by time and clustered into near-duplicates page by page
+        sentiment_index = SentimentIndex()
+        duplicate_index = NearDuplicateIndex()
+        with CommentCache() as comment_cache, open_comment_writer(args.output, output_format) as comment_writer:
+            def on_batch(batch):
+                comment_writer.write_batch(batch)
+                sentiment_index.add(batch)
+                duplicate_index.add(batch)
+
+            # Keep the comments in a compact columnar table instead of one dict per comment
+            fetched_comments = CommentTable(get_youtube_comments_cached(video_url_input, api_key, comment_cache,
+                                                                        max_comments=1500, checkpoint=checkpoint,
+                                                                        on_batch=on_batch))
+        if comment_writer.rows_written:
+            print(f"\nSuccessfully saved {comment_writer.rows_written} comments to {args.output}")
+        # A checkpoint of another video (e.g. left over while this one was served from the cache) is kept as it is
+        if checkpoint.video_id and checkpoint.video_id == get_video_id(video_url_input):
+            if not checkpoint.complete:
+                checkpoint.save(CHECKPOINT_PATH)
+                print(f"Fetch interrupted; progress saved to {CHECKPOINT_PATH}. Run again with the same URL to resume.")
+            elif os.path.exists(CHECKPOINT_PATH):
+                os.remove(CHECKPOINT_PATH)
 
         if fetched_comments:
             print("\n--- Fetched Comments (Preview with Sentiment) ---")
@@ -141,54 +1098,57 @@ if __name__ == "__main__":
                 print(f"Sentiment (Pos/Neu/Neg): {comment_data['sentiment_pos']:.2f}/{comment_data['sentiment_neu']:.2f}/{comment_data['sentiment_neg']:.2f}")
             
             # --- Overall Sentiment Summary ---
-            total_compound_score = sum(c['sentiment_compound'] for c in fetched_comments)
-            average_compound_score = total_compound_score / len(fetched_comments)
+            average_compound_score = fetched_comments.mean_compound()
 
             # Categorize comments based on VADER's typical thresholds for positive, neutral, negative
             # A compound score >= 0.05 is generally considered positive
             # A compound score <= -0.05 is generally considered negative
             # Scores between -0.05 and 0.05 are considered neutral
-            positive_comments = [c for c in fetched_comments if c['sentiment_compound'] >= 0.05]
-            neutral_comments = [c for c in fetched_comments if c['sentiment_compound'] > -0.05 and c['sentiment_compound'] < 0.05]
-            negative_comments = [c for c in fetched_comments if c['sentiment_compound'] <= -0.05]
+            positive_count, neutral_count, negative_count = fetched_comments.sentiment_counts()
 
             print("\n--- Overall Sentiment Summary ---")
             print(f"Total Comments Analyzed: {len(fetched_comments)}")
             print(f"Average Compound Sentiment Score: {average_compound_score:.2f}")
-            print(f"Positive Comments: {len(positive_comments)} ({(len(positive_comments)/len(fetched_comments))*100:.1f}%)")
-            print(f"Neutral Comments: {len(neutral_comments)} ({(len(neutral_comments)/len(fetched_comments))*100:.1f}%)")
-            print(f"Negative Comments: {len(negative_comments)} ({(len(negative_comments)/len(fetched_comments))*100:.1f}%)")
+            print(f"Like-Weighted Sentiment Score: {fetched_comments.like_weighted_sentiment():.2f}")
+            # Comments binned by publication time answer trend questions without rescanning them
+            print(f"Average Score in the First 24 Hours: {sentiment_index.first(DAY).mean_compound():.2f}")
+            print(f"Positive Comments: {positive_count} ({(positive_count/len(fetched_comments))*100:.1f}%)")
+            print(f"Neutral Comments: {neutral_count} ({(neutral_count/len(fetched_comments))*100:.1f}%)")
+            print(f"Negative Comments: {negative_count} ({(negative_count/len(fetched_comments))*100:.1f}%)")
+
+            # --- Near-Duplicate (Copy-Paste / Bot) Comments ---
+            duplicate_stats = duplicate_index.stats()
+            print("\n--- Near-Duplicate Comments ---")
+            print(f"Clusters of Near-Duplicates: {duplicate_stats['duplicate_clusters']} "
+                  f"({duplicate_stats['comments_in_duplicate_clusters']} comments)")
+            if duplicate_stats["duplicate_clusters"] and len(duplicate_index) == len(fetched_comments):
+                for size, first_row in duplicate_index.largest_clusters(5):
+                    print(f"- {size} comments like: {fetched_comments.texts[first_row][:80]}")
+                collapsed = fetched_comments.select(duplicate_index.first_of_cluster_mask())
+                print(f"Average Compound Sentiment Score (near-duplicates collapsed): {collapsed.mean_compound():.2f} "
+                      f"over {len(collapsed)} comments")
 
             # --- Visualize Sentiment Distribution (Pie Chart) ---
-            sentiment_labels = ['Positive', 'Neutral', 'Negative']
-            sentiment_counts = [len(positive_comments), len(neutral_comments), len(negative_comments)]
-            colors = ['#4CAF50', '#FFC107', '#F44336'] # Green for Positive, Amber for Neutral, Red for Negative
-
-            # Create the pie chart figure and axes
-            fig, ax = plt.subplots(figsize=(8, 8)) 
-            # Plot the pie chart
-            wedges, texts, autotexts = ax.pie(
-                sentiment_counts,
-                labels=sentiment_labels,
-                autopct='%1.1f%%', # Format percentages on slices (e.g., "74.1%")
-                colors=colors,
-                startangle=90, # Start the first slice (Positive) at the top
-                pctdistance=0.85 # Distance of percentage labels from the center of the pie
-            )
-
-            # Add a white circle to the center to create a donut chart effect
-            centre_circle = plt.Circle((0,0),0.70,fc='white')
-            fig.gca().add_artist(centre_circle)
-
-            ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a perfect circle.
-            ax.set_title('Overall Comment Sentiment Distribution', fontsize=16) # Set chart title
+            sentiment_counts = [positive_count, neutral_count, negative_count]
+            fig = plot_sentiment_pie(sentiment_counts)
 
             # Define the path and save the chart as a PNG image
             sentiment_chart_path = "sentiment_distribution_pie_chart.png"
-            plt.savefig(sentiment_chart_path, bbox_inches='tight', dpi=100) # bbox_inches='tight' prevents labels from being cut off
+            with profile_stage("charts"):
+                fig.savefig(sentiment_chart_path, bbox_inches='tight', dpi=100) # bbox_inches='tight' prevents labels from being cut off
             print(f"\nSentiment distribution pie chart saved to {sentiment_chart_path}")
             plt.close(fig) # Close the plot to free up memory and prevent display issues in CLI
 
+            # --- Visualize Sentiment Over Time (Trend Chart) ---
+            if len(sentiment_index):
+                trend_bucket_seconds = sentiment_index.suggest_rollup()
+                fig_trend = plot_sentiment_trend(sentiment_index.rollup(trend_bucket_seconds))
+                trend_chart_path = "sentiment_trend_chart.png"
+                with profile_stage("charts"):
+                    fig_trend.savefig(trend_chart_path, bbox_inches='tight', dpi=100)
+                print(f"Sentiment trend chart ({bucket_label(trend_bucket_seconds)} per bucket) saved to {trend_chart_path}")
+                plt.close(fig_trend)
+
             # --- Keyword/Topic Extraction Summary ---
             # Extract top keywords from all fetched comments
             top_keywords = extract_keywords(fetched_comments, num_keywords=10) # Get top 15 keywords
@@ -201,50 +1161,23 @@ if __name__ == "__main__":
 
             # --- Visualize Top Keywords (Bar Chart) ---
             if top_keywords:
-                keywords = [item[0] for item in top_keywords] 
-                counts = [item[1] for item in top_keywords] 
-
-                # Create the bar chart figure and axes
-                # Adjust height based on number of keywords for better readability
-                fig_bar, ax_bar = plt.subplots(figsize=(10, max(6, len(keywords) * 0.6)))
-                # Plot horizontal bars
-                ax_bar.barh(keywords, counts, color='skyblue')
-
-                # Set labels and title
-                ax_bar.set_xlabel('Frequency', fontsize=12)
-                ax_bar.set_ylabel('Keywords', fontsize=12)
-                ax_bar.set_title('Top Keywords/Topics in Comments', fontsize=16)
-                ax_bar.invert_yaxis() 
-
-                plt.tight_layout()
+                fig_bar = plot_keywords_bar(top_keywords)
 
                 # Define the path and save the chart as a PNG image
                 keywords_chart_path = "top_keywords_bar_chart.png"
-                plt.savefig(keywords_chart_path, bbox_inches='tight', dpi=100)
+                with profile_stage("charts"):
+                    fig_bar.savefig(keywords_chart_path, bbox_inches='tight', dpi=100)
                 print(f"\nTop keywords bar chart saved to {keywords_chart_path}")
                 plt.close(fig_bar) 
             else:
                 print("No meaningful keywords to visualize.")
 
-            # --- Save Comments to CSV ---
-    
-            csv_file_path = "youtube_comments_with_sentiment.csv"
-            # Define the headers for the CSV file, matching the dictionary keys
-            fieldnames = [
-                "author", "text", "published_at", "like_count",
-                "sentiment_compound", "sentiment_pos", "sentiment_neu", "sentiment_neg"
-            ]
-            try:
-                # Open the CSV file in write mode ('w'), with no extra blank rows (newline=''), and UTF-8 encoding
-                with open(csv_file_path, mode='w', newline='', encoding='utf-8') as file:
-                    writer = csv.DictWriter(file, fieldnames=fieldnames)
-                    writer.writeheader() # Write the header row
-                    writer.writerows(fetched_comments) # Write all comment dictionaries as rows
-                print(f"\nSuccessfully saved {len(fetched_comments)} comments to {csv_file_path}")
-            except Exception as e:
-                # Catch and print any errors that occur during file saving
-                print(f"\nError saving comments to CSV: {e}")
-
         else: # This block executes if 'fetched_comments' list is empty (e.g., invalid URL, API error, no comments found)
             print("\nNo comments were fetched or analyzed. Please check the video URL, your API key, or your quota.")
 
+    if profiler is not None:
+        profile_report = profiler.report()
+        print("\n" + profiler.format_summary(profile_report))
+        profiler.save(args.profile, profile_report)
+        print(f"Profile saved to {args.profile}")
+
@@ -1,21 +1,156 @@
 import streamlit as st
 import os
-import nltk
-from youtube_analyzer import get_video_id, get_youtube_comments, extract_keywords
-import matplotlib.pyplot as plt
-import csv
-import io # Ensure 'io' is imported for CSV download functionality
+from youtube_analyzer import (get_video_id, get_youtube_comments_cached, extract_keywords, RunningKeywords,
+                              default_score_cache, plot_sentiment_pie, plot_keywords_bar, plot_sentiment_trend,
+                              figure_to_png)
+from comment_cache import CommentCache, ResultCache
+from comment_table import CommentTable, SentimentTally
+from comment_export import CSVCommentWriter
+from sentiment_index import DAY, SentimentIndex, bucket_label
+from near_duplicates import NearDuplicateIndex
+from pipeline_profiler import PipelineProfiler
+import json
+from youtube_scheduler import FetchCheckpoint
+import tempfile
+import time
 
-# --- NLTK Data Download (for Streamlit Cloud deployment - Streamlit's recommended way) ---
-# Downloads all commonly used NLTK data. This should cover punkt, vader, and stopwords.
-nltk.download('all')
-# Note: For local development, if you encounter PermissionError, ensure VS Code is run as Administrator.
+# --- NLTK Data ---
+# The analyzer checks for the vader_lexicon and stopwords packages the first time it needs them
+# and downloads only those if they are missing, instead of downloading all NLTK data on every start.
 
 # --- Streamlit App Configuration and Initial UI ---
 # Set page configuration for the Streamlit app
 # layout="centered" puts content in a central column, but charts/tables can expand with use_container_width=True.
 st.set_page_config(page_title="YouTube Comment Analyzer", layout="centered")
 
+# Maximum comments fetched per video; be mindful of YouTube Data API quota limits
+MAX_COMMENTS = 35000
+# Finished analyses stay cached in the session for 30 minutes, up to 256 MB per session
+ANALYSIS_CACHE_TTL = 30 * 60
+ANALYSIS_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# CSV exports of all sessions share one directory, pruned of files older than the cache TTL:
+# their analyses have expired from every session cache (including sessions that have ended)
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "youtube_comment_analyzer_exports")
+
+# Choices for how near-duplicate (copy-paste / bot) comments enter the summaries
+DUPLICATE_VIEWS = {
+    "Keep all comments": "all",
+    "Collapse near-duplicates": "collapsed", # One comment per cluster of near-duplicates
+    "Exclude near-duplicates": "excluded", # Only comments without any near-duplicate
+}
+
+def summarize_comments(comments):
+    """Summary figures, top keywords and rendered charts of a CommentTable."""
+    sentiment_counts = comments.sentiment_counts()
+    top_keywords = extract_keywords(comments, num_keywords=10) # Set to 10 keywords as requested
+
+    # Charts are rendered to PNG once, so cached reruns just send the bytes again
+    pie_chart_png = figure_to_png(plot_sentiment_pie(sentiment_counts), dpi=150) if len(comments) else b""
+    keywords_chart_png = figure_to_png(plot_keywords_bar(top_keywords, height_per_keyword=0.5), dpi=150) if top_keywords else b""
+    return {
+        "comment_count": len(comments),
+        "average_compound": comments.mean_compound(),
+        "like_weighted": comments.like_weighted_sentiment(),
+        "sentiment_counts": sentiment_counts,
+        "top_keywords": top_keywords,
+        "pie_chart_png": pie_chart_png,
+        "keywords_chart_png": keywords_chart_png,
+    }
+
+def summary_bytes(summary):
+    """Memory held by a summary, counted against the session cache cap (the charts dominate)."""
+    return len(summary["pie_chart_png"]) + len(summary["keywords_chart_png"])
+
+def analyze_comments(fetched_comments, csv_path, sentiment_index, duplicate_index):
+    """
+    Computes everything the results section shows for a CommentTable: summary
+    figures, top keywords and the rendered charts. The CSV download is the file
+    at csv_path; the trend chart comes from sentiment_index and the duplicate
+    report from duplicate_index, all built while the comments were fetched.
+    """
+    # The duplicate masks are by row, so the index must hold exactly the table's comments
+    if len(duplicate_index) != len(fetched_comments):
+        duplicate_index = NearDuplicateIndex()
+        duplicate_index.add(fetched_comments)
+
+    summary = summarize_comments(fetched_comments)
+    # The trend is read from the time buckets, so it costs the same however many comments there are
+    trend_bucket_seconds = sentiment_index.suggest_rollup()
+    trend_chart_png = figure_to_png(plot_sentiment_trend(sentiment_index.rollup(trend_bucket_seconds)), dpi=150) if len(sentiment_index) else b""
+
+    # Only the row masks of the duplicate views are kept; the index itself (MinHash signatures
+    # and a dictionary of every distinct text) is several times the size of the table
+    duplicate_masks = {"collapsed": duplicate_index.first_of_cluster_mask(), "excluded": duplicate_index.unique_mask()}
+
+    return {
+        "comments": fetched_comments,
+        # Summaries per DUPLICATE_VIEWS value; the duplicate-free ones are added when first shown
+        "views": {"all": summary},
+        "duplicate_masks": duplicate_masks,
+        "duplicate_stats": duplicate_index.stats(),
+        "largest_clusters": [(size, fetched_comments.texts[row]) for size, row in duplicate_index.largest_clusters(10)],
+        "sentiment_index": sentiment_index,
+        "first_day_average": sentiment_index.first(DAY).mean_compound(),
+        "trend_bucket_seconds": trend_bucket_seconds,
+        "trend_chart_png": trend_chart_png,
+        "csv_path": csv_path,
+        # The CSV lives on disk, so only the table, the masks and the charts count against the memory cap;
+        # analysis_view() adds the summaries it computes later
+        "size_bytes": (fetched_comments.memory_usage() + sum(mask.nbytes for mask in duplicate_masks.values())
+                       + summary_bytes(summary) + len(trend_chart_png)),
+    }
+
+def analysis_view(analysis, view):
+    """
+    Returns the summary of an analysis for a DUPLICATE_VIEWS value, computing it
+    on first use and adding it to the analysis' size_bytes.
+    """
+    views = analysis["views"]
+    if view not in views:
+        views[view] = summarize_comments(analysis["comments"].select(analysis["duplicate_masks"][view]))
+        analysis["size_bytes"] += summary_bytes(views[view])
+    return views[view]
+
+def prune_export_files(export_dir=EXPORT_DIR, max_age=ANALYSIS_CACHE_TTL):
+    """Deletes the CSV exports last written more than max_age seconds ago."""
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(export_dir))
+    except OSError:
+        return # Nothing exported yet
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass # Removed by another session in the meantime
+
+def delete_export_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def retire_export_file(cache_key, analysis):
+    """
+    Marks the CSV export of an analysis that left the session cache for deletion.
+    The analysis may still be on screen in this run (e.g. one too large to cache),
+    so its file is only deleted at the start of the next run.
+    """
+    st.session_state.setdefault("retired_exports", []).append(analysis["csv_path"])
+
+def delete_retired_export_files():
+    """Deletes the exports retired during earlier runs, whose download buttons are no longer shown."""
+    for path in st.session_state.pop("retired_exports", []):
+        delete_export_file(path)
+
+def export_file_reader(path):
+    """Returns a callable that reads an export file, for a download button that reads it only when clicked."""
+    def read_export():
+        with open(path, "rb") as export_file:
+            return export_file.read()
+    return read_export
+
 # Set custom theme colors via .streamlit/config.toml
 # You've already set these:
 # Background: #FDFBF7 (light cream)
@@ -52,6 +187,9 @@ with col_button:
         # The actual analysis and display logic is handled by the top-level 'if video_url:' block below.
         pass
 
+# Progressive mode: show running results after every fetched page instead of only a spinner
+live_updates = st.checkbox("Show live results while fetching", value=True, key="live_updates")
+
 
 # --- ALL ANALYSIS OUTPUT (THIS IS THE KEY CHANGE FOR WIDE/CENTERED DISPLAY) ---
 # This entire block of code is at the top-level indentation (no leading spaces).
@@ -69,117 +207,190 @@ if video_url: # This 'if' must be at the top-level indentation (aligned with st.
         # Display an error if the API key is not found
         st.error("Error: YOUTUBE_API_KEY environment variable not set. Please set it securely in Streamlit Cloud secrets or locally in .streamlit/secrets.toml.")
     else:
-        # Use st.spinner to show a loading indicator while comments are being fetched and analyzed.
-        with st.spinner('Fetching and analyzing comments... This might take a moment depending on the video.'):
-            # Call the core function from youtube_analyzer.py to fetch comments.
-            # max_comments set to 35,000 as requested, but be mindful of YouTube Data API quota limits.
-            fetched_comments = get_youtube_comments(video_url, api_key, max_comments=35000)
+        # --- Session Result Cache ---
+        # Streamlit reruns this whole script on every widget interaction (download button, expanders, ...).
+        # Finished analyses are cached per session by (video ID, max comments), including the rendered
+        # charts and the path of the CSV export, so those reruns skip fetching, scoring and plotting entirely.
+        if "analysis_cache" not in st.session_state:
+            prune_export_files() # New session: clear out the exports of sessions that have ended
+        delete_retired_export_files()
+        analysis_cache = st.session_state.setdefault(
+            "analysis_cache", ResultCache(ttl=ANALYSIS_CACHE_TTL, max_bytes=ANALYSIS_CACHE_MAX_BYTES,
+                                          on_evict=retire_export_file)
+        )
+        cache_key = (get_video_id(video_url), MAX_COMMENTS)
+        analysis = analysis_cache.get(cache_key)
+
+        if analysis is None:
+            # --- Live Results While Fetching ---
+            # Running aggregators are updated with each page, so every refresh costs the same however many comments came before.
+            live_panel = st.empty()
+            live_tally = SentimentTally()
+            live_keywords = RunningKeywords(num_keywords=10)
+            # Comments are binned by publication time page by page, for the sentiment trend
+            sentiment_index = SentimentIndex()
+            # ... and clustered into near-duplicates, so spam can be collapsed without comparing every pair
+            duplicate_index = NearDuplicateIndex()
+
+            # --- Streaming CSV Export ---
+            # Rows are written to a temporary file as each page arrives, instead of building the
+            # whole CSV as a string in memory; the download button reads that file.
+            # Each fetch gets its own file; cached analyses retire theirs when they leave the cache (deleted
+            # on the next run, once no button offers it), and so do uncached ones (interrupted fetches, or
+            # analyses over the cache cap). Files outliving their session are pruned once older than the cache TTL.
+            os.makedirs(EXPORT_DIR, exist_ok=True)
+            prune_export_files()
+            export_fd, export_path = tempfile.mkstemp(prefix=f"{cache_key[0]}_", suffix=".csv", dir=EXPORT_DIR)
+            os.close(export_fd)
+            csv_writer = CSVCommentWriter(export_path)
+
+            def on_batch(batch):
+                csv_writer.write_batch(batch)
+                sentiment_index.add(batch)
+                duplicate_index.add(batch)
+                if live_updates:
+                    live_tally.add(batch)
+                    live_keywords.update(batch)
+                    positive_count, neutral_count, negative_count = live_tally.sentiment_counts()
+                    with live_panel.container():
+                        st.subheader("Live Results (still fetching...)")
+                        st.write(f"**Comments So Far:** {live_tally.count}")
+                        st.write(f"**Average Compound Sentiment Score:** {live_tally.mean_compound():.2f}")
+                        st.write(f"**Positive / Neutral / Negative:** {positive_count} / {neutral_count} / {negative_count}")
+                        st.dataframe([{"Keyword": kw, "Frequency": freq} for kw, freq in live_keywords.top()],
+                                     use_container_width=True, hide_index=True)
+
+            # Use st.spinner to show a loading indicator while comments are being fetched and analyzed.
+            # Every stage of the fetch and analysis reports its timings to this profiler (shown in the debug panel)
+            profiler = PipelineProfiler(label=cache_key[0])
+            with st.spinner('Fetching and analyzing comments... This might take a moment depending on the video.'), profiler.activate():
+                # Call the core function from youtube_analyzer.py to fetch comments.
+                # max_comments set to 35,000 as requested, but be mindful of YouTube Data API quota limits.
+                # Comments are served from the local cache; only comments newer than the cached ones are fetched.
+                # The checkpoint lives in the session, so an interrupted fetch resumes on the next click instead of starting over.
+                checkpoint = st.session_state.setdefault("fetch_checkpoint", FetchCheckpoint())
+                with CommentCache() as comment_cache, csv_writer:
+                    # Keep the comments in a compact columnar table instead of one dict per comment
+                    fetched_comments = CommentTable(get_youtube_comments_cached(video_url, api_key, comment_cache,
+                                                                                max_comments=MAX_COMMENTS, checkpoint=checkpoint,
+                                                                                on_batch=on_batch))
+                live_panel.empty() # The full results below replace the live view
+                fetch_interrupted = checkpoint.video_id == cache_key[0] and not checkpoint.complete
+                if fetch_interrupted:
+                    st.warning("The fetch was interrupted (API error or quota). Showing the comments fetched so far; click Analyze Comments again to resume.")
+
+                if fetched_comments:
+                    analysis = analyze_comments(fetched_comments, csv_writer.path, sentiment_index, duplicate_index)
+                    analysis["profile"] = profiler.report()
+                    # Partial results are not cached, so the next click resumes the fetch
+                    if not fetch_interrupted:
+                        os.utime(csv_writer.path) # Its age for pruning now starts with the cache entry's TTL
+                        analysis_cache.put(cache_key, analysis, analysis["size_bytes"])
+                    else:
+                        retire_export_file(cache_key, analysis)
+                else:
+                    delete_export_file(csv_writer.path)
 
-        if fetched_comments:
+        if analysis:
+            fetched_comments = analysis["comments"]
             # Display success message after fetching comments
             st.success(f"Successfully fetched and analyzed {len(fetched_comments)} comments!")
 
+            # --- Near-Duplicate Handling ---
+            # Copy-paste and bot comments can be collapsed or left out of the summaries below
+            duplicate_choice = st.radio("Near-duplicate comments", list(DUPLICATE_VIEWS), horizontal=True, key="duplicate_view",
+                                        help="Near-duplicates are comments whose text is (almost) identical to another comment's.")
+            view = analysis_view(analysis, DUPLICATE_VIEWS[duplicate_choice])
+            analysis_cache.resize(cache_key, analysis["size_bytes"]) # The view may have just been added
+            summarized_count = view["comment_count"]
+
             # --- Overall Sentiment Summary Display ---
             # Using st.expander to make this section collapsible, keeping the UI clean.
             # It starts expanded by default (expanded=True).
             with st.expander("Click to view Overall Sentiment Summary", expanded=True):
                 st.subheader("Overall Sentiment Summary")
-                # Calculate total and average compound sentiment scores
-                total_compound_score = sum(c['sentiment_compound'] for c in fetched_comments)
-                average_compound_score = total_compound_score / len(fetched_comments)
-
-                # Categorize comments based on VADER's standard thresholds for sentiment
-                positive_comments = [c for c in fetched_comments if c['sentiment_compound'] >= 0.05]
-                neutral_comments = [c for c in fetched_comments if c['sentiment_compound'] > -0.05 and c['sentiment_compound'] < 0.05]
-                negative_comments = [c for c in fetched_comments if c['sentiment_compound'] <= -0.05]
+                positive_count, neutral_count, negative_count = view["sentiment_counts"]
 
                 # Display sentiment metrics using f-strings for formatted output
-                st.write(f"**Total Comments Analyzed:** {len(fetched_comments)}")
-                st.write(f"**Average Compound Sentiment Score:** {average_compound_score:.2f}")
-                st.write(f"**Positive Comments:** {len(positive_comments)} ({(len(positive_comments)/len(fetched_comments))*100:.1f}%)")
-                st.write(f"**Neutral Comments:** {len(neutral_comments)} ({(len(neutral_comments)/len(fetched_comments))*100:.1f}%)")
-                st.write(f"**Negative Comments:** {len(negative_comments)} ({(len(negative_comments)/len(fetched_comments))*100:.1f}%)")
+                st.write(f"**Total Comments Analyzed:** {summarized_count}")
+                if summarized_count:
+                    st.write(f"**Average Compound Sentiment Score:** {view['average_compound']:.2f}")
+                    st.write(f"**Like-Weighted Sentiment Score:** {view['like_weighted']:.2f}")
+                    st.write(f"**Average Score in the First 24 Hours:** {analysis['first_day_average']:.2f} (all comments)")
+                    st.write(f"**Positive Comments:** {positive_count} ({(positive_count/summarized_count)*100:.1f}%)")
+                    st.write(f"**Neutral Comments:** {neutral_count} ({(neutral_count/summarized_count)*100:.1f}%)")
+                    st.write(f"**Negative Comments:** {negative_count} ({(negative_count/summarized_count)*100:.1f}%)")
 
             # --- Sentiment Distribution Pie Chart ---
-            st.subheader("Sentiment Distribution")
-            sentiment_labels = ['Positive', 'Neutral', 'Negative']
-            sentiment_counts = [len(positive_comments), len(neutral_comments), len(negative_comments)]
-            colors = ['#4CAF50', '#FFC107', '#F44336'] # Green, Amber, Red for sentiment slices
-
-            # Create the Matplotlib figure and axes for the pie chart
-            fig, ax = plt.subplots(figsize=(8, 8)) # Fixed size for the pie chart for consistency
-            ax.pie(
-                sentiment_counts,
-                labels=sentiment_labels,
-                autopct='%1.1f%%', # Format percentages (e.g., "40.0%")
-                colors=colors,
-                startangle=90, # Start the first slice (Positive) at the top (12 o'clock)
-                pctdistance=0.85 # Distance of percentage labels from the center of the pie
-            )
-            # Add a white circle in the center to create a donut chart effect
-            centre_circle = plt.Circle((0,0),0.70,fc='white')
-            fig.gca().add_artist(centre_circle) # Add the circle to the current axes of the figure
-            ax.axis('equal') # Ensure pie is drawn as a perfect circle, not an ellipse
-            ax.set_title('Overall Comment Sentiment Distribution', fontsize=16)
-            st.pyplot(fig) # Display the matplotlib figure in Streamlit
-            plt.close(fig) # Close the figure to free memory and prevent display issues
+            if view["pie_chart_png"]:
+                st.subheader("Sentiment Distribution")
+                st.image(view["pie_chart_png"], use_container_width=True) # Pre-rendered, so reruns do not redraw it
+
+            # --- Sentiment Trend Chart ---
+            if analysis["trend_chart_png"]:
+                st.subheader("Sentiment Over Time")
+                st.image(analysis["trend_chart_png"], use_container_width=True)
+                st.caption(f"All comments, grouped by {bucket_label(analysis['trend_bucket_seconds'])} of publication time (UTC).")
 
             # --- Top Keywords/Topics Display and Bar Chart ---
             st.subheader("Top Keywords/Topics")
-            # Extract top keywords using the function from youtube_analyzer.py
-            top_keywords = extract_keywords(fetched_comments, num_keywords=10) # Set to 10 keywords as requested
+            top_keywords = view["top_keywords"]
             if top_keywords:
                 # Prepare keyword data for display in a Streamlit dataframe (tabular view)
                 keywords_display_data = [{"Keyword": kw, "Frequency": freq} for kw, freq in top_keywords]
                 # use_container_width=True makes the dataframe expand to the available width.
                 st.dataframe(keywords_display_data, use_container_width=True, hide_index=True)
-
-                # Prepare data for the horizontal bar chart
-                keywords = [item[0] for item in top_keywords]
-                counts = [item[1] for item in top_keywords]
-
-                # Create the bar chart figure
-                # Dynamically adjust figure height based on the number of keywords to prevent overlap.
-                fig_bar, ax_bar = plt.subplots(figsize=(10, max(6, len(keywords) * 0.5)))
-                ax_bar.barh(keywords, counts, color='skyblue') # Use barh for horizontal bars
-                ax_bar.set_xlabel('Frequency', fontsize=12)
-                ax_bar.set_ylabel('Keywords', fontsize=12)
-                ax_bar.set_title('Top Keywords/Topics in Comments', fontsize=16)
-                ax_bar.invert_yaxis() # Invert Y-axis to show the highest count keyword at the top of the chart (more intuitive ranking)
-                plt.tight_layout() # Adjusts plot parameters for a tight layout, preventing labels from overlapping
-                st.pyplot(fig_bar) # Display the bar chart in Streamlit
-                plt.close(fig_bar) # Close the figure
-
+                st.image(view["keywords_chart_png"], use_container_width=True)
             else:
                 st.write("No meaningful keywords found for analysis.")
 
+            # --- Near-Duplicate Report ---
+            with st.expander("Near-duplicate comments", expanded=False):
+                duplicate_stats = analysis["duplicate_stats"]
+                st.write(f"**Clusters of Near-Duplicates:** {duplicate_stats['duplicate_clusters']} "
+                         f"({duplicate_stats['comments_in_duplicate_clusters']} comments)")
+                st.write(f"**Comments Removed When Collapsing:** {duplicate_stats['redundant_comments']}")
+                if analysis["largest_clusters"]:
+                    st.dataframe([{"Comments": size, "Example": text} for size, text in analysis["largest_clusters"]],
+                                 use_container_width=True, hide_index=True)
+
             # --- Download Comments as CSV Button ---
-            # This section creates CSV data in memory and provides a download button.
-            csv_data_string = ""
-            fieldnames = [
-                "author", "text", "published_at", "like_count",
-                "sentiment_compound", "sentiment_pos", "sentiment_neu", "sentiment_neg"
-            ]
-
-            # Use io.StringIO to write CSV data to a string buffer in memory
-            writer_output = io.StringIO() # Changed variable name to avoid potential conflict if any
-            writer = csv.DictWriter(writer_output, fieldnames=fieldnames)
-            writer.writeheader() # Write the column headers
-            writer.writerows(fetched_comments) # Write the comment data rows
-            csv_data_string = writer_output.getvalue() # Get the full CSV string
-            writer_output.close() # Close the string buffer
-
-            # Display the download button
-            st.download_button(
-                label="Download Comments as CSV", # Text displayed on the button
-                data=csv_data_string, # The actual CSV data
-                file_name="youtube_comments_with_sentiment.csv", # Default file name for download
-                mime="text/csv", # MIME type for CSV files
-                use_container_width=True # Make the button stretch to the full available width
-            )
+            # The CSV file written while the comments were fetched is read only when the button is clicked,
+            # not on every rerun. Streamlit serves a download from memory, though: a click still loads the
+            # whole file into its media storage for the rest of the session, so the download is not bounded.
+            if os.path.exists(analysis["csv_path"]):
+                st.download_button(
+                    label="Download Comments as CSV", # Text displayed on the button
+                    data=export_file_reader(analysis["csv_path"]),
+                    file_name="youtube_comments_with_sentiment.csv", # Default file name for download
+                    mime="text/csv", # MIME type for CSV files
+                    on_click="ignore", # Downloading needs no rerun
+                    use_container_width=True # Make the button stretch to the full available width
+                )
 
         else: # If get_youtube_comments returned an empty list of comments (e.g., no comments, video error, quota)
             st.warning("No comments were fetched for this video. Please check the URL, if the video has comments enabled, your API key, or your daily API quota.")
+
+        # --- Debug Panel ---
+        with st.expander("Debug: pipeline profile and cache statistics", expanded=False):
+            if analysis and "profile" in analysis:
+                profile = analysis["profile"]
+                pages = profile["pages"]
+                st.write("**Pipeline profile** (of the fetch and analysis that produced these results)")
+                st.write(f"Wall time: {profile['wall_seconds']:.2f} s, {profile['comments_per_second'] or 0:.0f} comments/s, "
+                         f"peak RSS: {profile['peak_rss_mb']} MB")
+                if pages["count"]:
+                    st.write(f"API pages: {pages['count']}, latency mean {pages['mean_ms']:.0f} ms, "
+                             f"p95 {pages['p95_ms']:.0f} ms, max {pages['max_ms']:.0f} ms")
+                st.dataframe([{"Stage": name, **values} for name, values in
+                               sorted(profile["stages"].items(), key=lambda entry: -entry[1]["seconds"])],
+                             use_container_width=True, hide_index=True)
+                st.download_button("Download profile (JSON)", data=json.dumps(profile, indent=2),
+                                   file_name="pipeline_profile.json", mime="application/json")
+            st.write("**Session analysis cache**")
+            st.json(analysis_cache.stats())
+            st.write("**Sentiment score cache**")
+            st.json(default_score_cache.stats())
 else: # This 'else' corresponds to the top-level 'if video_url:' block.
     # This message appears when the app first loads or if the URL input is empty and Analyze is clicked.
     st.write("") # Add a spacer for better visual separation.
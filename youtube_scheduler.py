@@ -0,0 +1,211 @@
+import contextvars
+import json
+import random
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# 403 reasons that mean "slow down" (retryable) rather than "out of quota" (fatal)
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+# Event that ends the retry waits of requests executed in the current context, see cancel_requests_on()
+_cancel_event = contextvars.ContextVar("youtube_request_cancel_event", default=None)
+
+class QuotaExceededError(Exception):
+    """Raised when the daily API quota is used up (reported by the API or by our own budget)."""
+
+class RequestCancelled(Exception):
+    """Raised by RequestScheduler.execute when its fetch was stopped while the request waited to be retried."""
+
+def cancel_requests_on(event):
+    """
+    Makes RequestScheduler.execute calls in the current context give up once
+    `event` (a threading.Event) is set: a retry backoff wait ends early and
+    RequestCancelled is raised instead of retrying. Call it at the start of a
+    background fetch thread so stopping the fetch does not wait out a backoff.
+    """
+    _cancel_event.set(event)
+
+def error_reason(error):
+    """Returns the reason string of a googleapiclient HttpError (e.g. "quotaExceeded"), or None."""
+    try:
+        details = json.loads(error.content)["error"]
+        return details["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError, TypeError):
+        pass
+    for detail in getattr(error, "error_details", None) or []:
+        if isinstance(detail, dict) and "reason" in detail:
+            return detail["reason"]
+    return None
+
+class TokenBucket:
+    """Thread-safe token bucket: allows bursts of `capacity` requests and `rate` requests per second on average."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` tokens are available and takes them."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+class RequestScheduler:
+    """
+    Sits between the analyzer and googleapiclient: every request goes through
+    execute(), which
+    - waits for the token bucket (rate requests/second, bursts of `burst`),
+    - counts the quota units spent and refuses to go past quota_limit,
+    - retries 429, 5xx, rate-limit 403s and connection errors with jittered
+      exponential backoff (up to max_retries times),
+    - turns a "quota exceeded" 403 into QuotaExceededError.
+    Use wrap(client) to route a client's requests through the scheduler.
+    """
+
+    def __init__(self, rate=10.0, burst=10, quota_limit=None, max_retries=5, backoff_base=1.0, backoff_max=64.0,
+                 sleep=time.sleep):
+        self.bucket = TokenBucket(rate, burst, sleep=sleep)
+        self.quota_limit = quota_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.quota_used = 0
+        self.requests = 0
+        self.retries = 0
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff: a random delay up to base * 2**attempt seconds (capped)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _spend(self, cost):
+        with self._lock:
+            if self.quota_limit is not None and self.quota_used + cost > self.quota_limit:
+                raise QuotaExceededError(
+                    f"Quota budget of {self.quota_limit} units reached ({self.quota_used} used)."
+                )
+            self.quota_used += cost
+            self.requests += 1
+
+    def execute(self, request, cost=1):
+        """Executes a googleapiclient request with rate limiting, quota accounting and retries."""
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            self._spend(cost) # Failed requests cost quota too
+            try:
+                return request.execute()
+            except HttpError as e:
+                status = e.resp.status
+                reason = error_reason(e)
+                if reason in QUOTA_REASONS:
+                    raise QuotaExceededError(f"YouTube API quota exceeded: {e}") from e
+                retryable = status in RETRYABLE_STATUSES or (status == 403 and reason in RATE_LIMIT_REASONS)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+            except (ConnectionError, TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+            with self._lock:
+                self.retries += 1
+            delay = self.backoff_delay(attempt)
+            cancel_event = _cancel_event.get()
+            if cancel_event is None:
+                self._sleep(delay)
+            elif cancel_event.wait(delay):
+                raise RequestCancelled("The fetch was stopped while a request waited to be retried.")
+            attempt += 1
+
+    def wrap(self, client):
+        """Returns a proxy of an API client whose requests are executed through this scheduler."""
+        return wrap_requests(client, self.execute)
+
+    def stats(self):
+        return {"requests": self.requests, "retries": self.retries, "quota_used": self.quota_used,
+                "quota_limit": self.quota_limit}
+
+class _RequestProxy:
+    """
+    Proxy of an API client, resource or request that sends every request's
+    execute() through execute_request(request) instead.
+    """
+
+    def __init__(self, target, execute_request):
+        self._target = target
+        self._execute_request = execute_request
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if name == "execute":
+            return lambda: self._execute_request(self._target)
+        if callable(attribute):
+            return lambda *args, **kwargs: _RequestProxy(attribute(*args, **kwargs), self._execute_request)
+        return attribute
+
+def wrap_requests(client, execute_request):
+    """
+    Returns a proxy of an API client whose requests are executed by calling
+    execute_request(request), e.g. to hold a semaphore around request.execute().
+    """
+    return _RequestProxy(client, execute_request)
+
+class FetchCheckpoint:
+    """
+    Progress of a comment fetch: the video, the pageToken of the next page to
+    fetch and the comments fetched so far. An interrupted fetch leaves
+    complete=False, and passing the checkpoint again resumes from page_token
+    instead of refetching. save()/load() keep it across runs as JSON.
+    When the comments include replies (fetch_comments_for_videos),
+    thread_count is the number of top-level comments among them, and
+    failed_replies lists [parent ID, index of the parent in comments] for every
+    thread whose replies could not be fetched; resuming fetches those again.
+    """
+
+    def __init__(self, video_id=None, page_token=None, comments=None, complete=False, thread_count=0,
+                 failed_replies=None):
+        self.video_id = video_id
+        self.page_token = page_token
+        self.comments = comments if comments is not None else []
+        self.complete = complete
+        self.thread_count = thread_count
+        self.failed_replies = failed_replies if failed_replies is not None else []
+
+    def reset(self, video_id):
+        """Starts over for a (different) video."""
+        self.video_id = video_id
+        self.page_token = None
+        self.comments = []
+        self.complete = False
+        self.thread_count = 0
+        self.failed_replies = []
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(vars(self), file)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a saved checkpoint, or returns an empty one if the file does not exist."""
+        try:
+            with open(path, encoding="utf-8") as file:
+                return cls(**json.load(file))
+        except FileNotFoundError:
+            return cls()